@@ -1,8 +1,60 @@
-from ASA.ASA_tree_and_d_queue import ASA
+import heapq
+from collections import Counter
+import sys
+import weakref
+from numbers import Real
+
+import numpy as np
+
+from ASA.ASA_tree_and_d_queue import ASA, ASABaseElem, ELEMENT_BYTES, NODE_BYTES, footprint, is_null
+from AGDS.bitmap import RowBitmap
+from AGDS.lazy_attributes import LazyAttributes
+from AGDS.query import Eq, Not, Range
+from AGDS.spill import SpillStore
+from ASA.instrumentation import InstrumentedASA
+from ASA.nominal_values import NominalValues
+
+# numpy dtype kinds (int, unsigned, float) which are kept in ordered ASA trees
+ORDERED_DTYPE_KINDS = 'iuf'
+
+# upper bound of query x row score cells kept in memory at once by AGDS.predict
+PREDICT_SCORE_CELLS = 2 ** 23
+
+# amortized size of one attribute dict entry, a row link costs one on the element and one on the row node
+LINK_BYTES = (sys.getsizeof(dict.fromkeys(range(1024))) - sys.getsizeof({})) / 1024
+
+
+def linked_rows(element):
+    # rows are linked to value elements as `O{index}` attributes
+    return [(key, value) for key, value in vars(element).items() if isinstance(value, RowNode)]
+
+
+def row_index(row_id):
+    # dense integer index of an `O{index}` row id
+    return int(row_id[1:])
+
+
+def all_elements(container):
+    # ordered (or hashed) elements followed by the null bucket
+    yield from container
+    if container.nulls is not None:
+        yield container.nulls
+
+
+def container_bytes(container):
+    # estimated resident size of a value container, its elements and their row links
+    size = sys.getsizeof(container)
+    for element in all_elements(container):
+        size += sys.getsizeof(element) + sys.getsizeof(vars(element))
+    return size
 
 
 # This will be dynamically created to add column information
 class RowNode:
+    # duplicate records collapsed into this row, set only for deduplicated rows
+    _count = 1
+    _indices = None
+
     def __init__(self, hash_key):
         self._hash_key = hash_key
 
@@ -21,30 +73,860 @@ class RowNode:
 
 
 class AGDS:
-    def __init__(self):
-        self.attributes = {}
+    def __init__(self, query_cache=None, max_materialized=None, max_bytes=None, spill_dir=None, instrument=False):
+        # attributes keep at most `max_materialized` containers / `max_bytes` resident at once,
+        # cold ones are spilled to `spill_dir` when it is given
+        # ordered attributes and compound indexes count their work when `instrument` is set, see operation_counters
+        self._ordered = InstrumentedASA if instrument else ASA
+        self.attributes = LazyAttributes(
+            self._materialize, self._release, max_materialized, max_bytes, container_bytes,
+            SpillStore(spill_dir) if spill_dir is not None else None,
+        )
         self.rows = {}
+        self._next_row = 0
+        # bumped whenever rows are added or removed, see _versions
+        self._rows_version = 0
+        # (rows version, RowBitmap of all rows) shared by bitmap queries
+        self._all_rows = None
+        # row_id -> RowNode of rows standing for several duplicate records
+        self._collapsed = {}
+        # tuple of attributes -> ASA keyed by tuples of their values
+        self.indexes = {}
+        # optional result_cache.QueryCache in front of query, bitmap and similar
+        self.query_cache = query_cache
+        # id(element) -> numpy array of linked row indexes, dropped on every link change
+        self._row_index_cache = {}
+        # attribute -> (weak reference to container, container version, statistics)
+        self._stats_cache = {}
+        # attribute -> (weak reference to container, container version, sorted keys, offsets, row indexes)
+        self._sorted_rows_cache = {}
+
+    def build_from_pandas(self, pd_dataframe, nominal=None, deduplicate=False, lazy=False, row_numbers=None):
+        """Build the graph from a DataFrame.
+
+        Columns listed in `nominal` are stored in hash based NominalValues
+        containers, the rest in ASA trees. When `nominal` is None, every
+        column which is not int/float typed is treated as nominal.
+
+        With `deduplicate` identical records share one row node, named after
+        the first occurrence, which remembers its multiplicity and original
+        indexes. Value counts still include every record.
+
+        With `lazy` only row nodes are created up front, every column is kept
+        as a source array and its container and row links are built on first
+        access of `self.attributes[col]`.
+
+        Rows are named `O{position}` after their position in the frame, or
+        after the matching entry of `row_numbers` when it is given.
+        """
+        self._row_index_cache.clear()
+        numbers = range(len(pd_dataframe)) if row_numbers is None else list(row_numbers)
 
-    def build_from_pandas(self, pd_dataframe):
         columns = pd_dataframe.columns
-        for ind, col in enumerate(columns):
-            self.attributes[col] = ASA()
-
-            for index, val in enumerate(pd_dataframe[col]):
-                inserted = self.attributes[col].insert(val)
-
-                if f'O{index}' not in self.rows:
-                    rn = RowNode(f'O{index}')
-                    setattr(rn, col, inserted)
-                    self.rows[f'O{index}'] = rn
-                else:
-                    rn = self.rows[f'O{index}']
-                    if not hasattr(rn, col):
-                        setattr(rn, col, inserted)
-                        self.rows[f'O{index}'] = rn
-
-                if not hasattr(inserted, f'O{index}'):
-                    setattr(inserted, f'O{index}', self.rows[f'O{index}'])
+        if nominal is None:
+            nominal = [col for col in columns if pd_dataframe[col].dtype.kind not in ORDERED_DTYPE_KINDS]
+
+        representative = self._representative_rows(pd_dataframe) if deduplicate else range(len(pd_dataframe))
+        row_ids = [f'O{numbers[index]}' for index in representative]
+
+        # rows already in the graph leave compound indexes before their values change
+        for row_id in dict.fromkeys(row_ids) if self.indexes else ():
+            if row_id in self.rows:
+                self._unindex_row(self.rows[row_id], row_id)
+
+        # replaced attributes drop their row links, rows keep no link into a discarded container
+        for col in columns:
+            if self.attributes.is_materialized(col):
+                self._release(col, self.attributes[col])
+
+        for row_id in row_ids:
+            if row_id not in self.rows:
+                self.rows[row_id] = RowNode(row_id)
+
+        for col in columns:
+            # numeric columns stay numpy arrays until built, Python objects are created per materialized column
+            column = pd_dataframe[col]
+            values = column.to_numpy() if column.dtype.kind in ORDERED_DTYPE_KINDS else column.tolist()
+            source = values, row_ids, col in nominal
+            if lazy:
+                self.attributes.defer(col, source)
+            else:
+                self.attributes[col] = self._materialize(col, source)
+
+        if deduplicate:
+            for index, original in enumerate(representative):
+                rn = self.rows[f'O{numbers[original]}']
+                if rn._indices is None:
+                    rn._indices = []
+                rn._indices.append(numbers[index])
+
+            for row_id, rn in self.rows.items():
+                if rn._indices is not None:
+                    rn._count = len(rn._indices)
+                    if rn._count > 1:
+                        self._collapsed[row_id] = rn
+
+        self._next_row = max(self._next_row, max(numbers, default=-1) + 1)
+        self._rows_version += 1
+
+        with self.attributes.pinned():
+            for row_id in dict.fromkeys(row_ids) if self.indexes else ():
+                self._index_row(self.rows[row_id], row_id)
+
+    def build_from_triples(self, triples, nominal=None):
+        """Build the graph from sparse (row, column, value) triples.
+
+        Only present values are inserted, so cost and memory follow the
+        number of triples rather than rows x columns, and a row node links
+        only the attributes it has. Rows are named `O{row}`, a repeated
+        (row, column) pair keeps its last value. Columns listed in `nominal`
+        use NominalValues, other new columns are picked by value type.
+        Null values are treated as absent.
+        """
+        # rows created or changed by the triples, compound indexes are updated once at the end
+        touched = {}
+        for row, col, val in triples:
+            if is_null(val):
+                continue
+
+            row_id = f'O{row}'
+            rn = self.rows.get(row_id)
+            if rn is None:
+                rn = RowNode(row_id)
+                self.rows[row_id] = rn
+                self._next_row = max(self._next_row, row + 1)
+            elif self.indexes and row_id not in touched:
+                self._unindex_row(rn, row_id)
+            touched[row_id] = rn
+
+            if nominal is not None and col not in self.attributes:
+                self.attributes[col] = NominalValues() if col in nominal else self._ordered()
+
+            # lazily built attribute has to be materialized before its links are inspected
+            self._container(col, val)
+            if hasattr(rn, col):
+                self._unlink(rn, row_id, col)
+            self._link(rn, row_id, col, val)
+
+        self._rows_version += 1
+
+        with self.attributes.pinned():
+            for row_id, rn in touched.items() if self.indexes else ():
+                self._index_row(rn, row_id)
+
+    def build_from_records(self, records, nominal=None):
+        # dict of features per row, missing keys are absent values
+        self.build_from_triples(
+            ((row, col, val) for row, record in enumerate(records) for col, val in record.items()), nominal,
+        )
+
+    def build_from_sparse(self, matrix, columns=None, nominal=None):
+        """Build the graph from a scipy.sparse matrix or any object with COO row/col/data arrays.
+
+        Stored entries (explicit zeros included) are the present values,
+        `columns` names the matrix columns, by default they are the column
+        indexes as strings (row nodes link attributes by name).
+        """
+        coo = matrix.tocoo() if hasattr(matrix, 'tocoo') else matrix
+        names = list(columns) if columns is not None else None
+
+        self.build_from_triples(
+            (
+                (row, names[col] if names is not None else str(col), val)
+                for row, col, val in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())
+            ),
+            nominal,
+        )
+
+    def _materialize(self, col, source):
+        values, row_ids, nominal = source
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        container = NominalValues() if nominal else self._ordered()
+
+        for row_id, val in zip(row_ids, values):
+            rn = self.rows.get(row_id)
+            if rn is None:
+                # row deleted before the attribute was materialized
+                continue
+
+            inserted = container.insert(val)
+            if not hasattr(rn, col):
+                setattr(rn, col, inserted)
+
+            if not hasattr(inserted, row_id):
+                setattr(inserted, row_id, rn)
+
+        return container
+
+    def _release(self, col, container):
+        # turn a materialized attribute back into a source, keeping later row mutations
+        values = []
+        row_ids = []
+        for element in all_elements(container):
+            self._row_index_cache.pop(id(element), None)
+            for row_id, rn in linked_rows(element):
+                values.extend([element.key] * rn._count)
+                row_ids.extend([row_id] * rn._count)
+                delattr(rn, col)
+
+        self._stats_cache.pop(col, None)
+        self._sorted_rows_cache.pop(col, None)
+        return values, row_ids, isinstance(container, NominalValues)
+
+    @staticmethod
+    def _representative_rows(pd_dataframe):
+        # index of the first identical record for every record of the frame
+        if not len(pd_dataframe.columns):
+            return np.zeros(len(pd_dataframe), dtype=np.int64).tolist()
+
+        groups = pd_dataframe.groupby(list(pd_dataframe.columns), dropna=False, sort=False).ngroup().to_numpy()
+        _, first = np.unique(groups, return_index=True)
+        return first[groups].tolist()
+
+    def multiplicity(self, row_id):
+        return self.rows[row_id]._count
+
+    def original_indices(self, row_id):
+        rn = self.rows[row_id]
+        return list(rn._indices) if rn._indices is not None else [row_index(row_id)]
+
+    def add_row(self, mapping):
+        row_id = f'O{self._next_row}'
+        self._next_row += 1
+
+        rn = RowNode(row_id)
+        self.rows[row_id] = rn
+        self._rows_version += 1
+
+        for col, val in mapping.items():
+            self._link(rn, row_id, col, val)
+
+        self._index_row(rn, row_id)
+        return row_id
+
+    def delete_row(self, row_id):
+        rn = self.rows.pop(row_id)
+        self._collapsed.pop(row_id, None)
+        self._rows_version += 1
+        self._unindex_row(rn, row_id)
+
+        for col in self.attributes:
+            if hasattr(rn, col):
+                self._unlink(rn, row_id, col)
+
+    def update_row(self, row_id, changes):
+        rn = self.rows[row_id]
+        touched = [attributes for attributes in self.indexes if set(attributes) & set(changes)]
+        self._unindex_row(rn, row_id, touched)
+
+        for col, val in changes.items():
+            # lazily built attribute has to be materialized before its links are inspected
+            self._container(col, val)
+
+            if hasattr(rn, col):
+                if getattr(rn, col) == val:
+                    continue
+                self._unlink(rn, row_id, col)
+
+            self._link(rn, row_id, col, val)
+
+        self._index_row(rn, row_id, touched)
+
+    def create_index(self, *attributes):
+        """Build a compound index, an ASA keyed by tuples of `attributes` values.
+
+        Tuples order lexicographically, so equality on a prefix of the
+        attributes optionally followed by a range on the next one is a single
+        range scan. Rows missing any of the values are not indexed. The index
+        follows row mutations and is used by `query` when it is the most
+        selective way to produce candidates.
+        """
+        index = self._ordered()
+        self.indexes[attributes] = index
+        with self.attributes.pinned():
+            for row_id, rn in self.rows.items():
+                self._index_row(rn, row_id, [attributes])
+
+        return index
+
+    def drop_index(self, *attributes):
+        del self.indexes[attributes]
+
+    def operation_counters(self):
+        """Sum of the InstrumentedASA counters of resident ordered attributes and indexes.
+
+        Empty unless the graph was created with `instrument=True`. Counters of
+        attributes released by the lazy attribute store are lost with them.
+        """
+        containers = [self.attributes[col] for col in self.attributes.materialized()] + list(self.indexes.values())
+        return sum((container.counters for container in containers if hasattr(container, 'counters')), Counter())
+
+    def _index_key(self, rn, attributes):
+        key = []
+        for col in attributes:
+            # lazily built attribute has to be materialized before its links are read
+            self.attributes[col]
+            element = getattr(rn, col, None)
+            if element is None or is_null(element.key):
+                return None
+            key.append(element.key)
+
+        return tuple(key)
+
+    def _index_row(self, rn, row_id, indexes=None):
+        for attributes in self.indexes if indexes is None else indexes:
+            with self.attributes.pinned():
+                key = self._index_key(rn, attributes)
+            if key is None:
+                continue
+
+            for _ in range(rn._count):
+                inserted = self.indexes[attributes].insert(key)
+            setattr(inserted, row_id, rn)
+
+    def _unindex_row(self, rn, row_id, indexes=None):
+        for attributes in self.indexes if indexes is None else indexes:
+            with self.attributes.pinned():
+                key = self._index_key(rn, attributes)
+            if key is None:
+                continue
+
+            index = self.indexes[attributes]
+            element, _ = index.search(key)
+            delattr(element, row_id)
+            for _ in range(rn._count):
+                index.delete(key)
+
+    def _index_plan(self, predicates):
+        # longest Eq prefix (plus optional Range) of any compound index, covering at least 2 predicates
+        equal = {}
+        ranges = {}
+        for predicate in predicates:
+            # null values match nothing and cannot be ordered inside index keys
+            if isinstance(predicate, Eq) and not is_null(predicate.value):
+                equal.setdefault(predicate.attribute, predicate)
+            elif isinstance(predicate, Range):
+                ranges.setdefault(predicate.attribute, predicate)
+
+        best = None
+        for attributes, index in self.indexes.items():
+            covered = []
+            for col in attributes:
+                if col in equal:
+                    covered.append(equal[col])
+                    continue
+                # a range over a nominal attribute is left to raise in its own plan
+                if col in ranges and hasattr(self.attributes[col], 'scan'):
+                    covered.append(ranges[col])
+                break
+
+            if len(covered) > 1 and (best is None or len(covered) > len(best[1])):
+                best = index, covered
+
+        if best is None:
+            return None
+
+        index, covered = best
+        elements = list(self._index_scan(index, covered))
+        return sum(el.count for el in elements), covered, elements
+
+    @staticmethod
+    def _index_scan(index, covered):
+        last = covered[-1] if isinstance(covered[-1], Range) else None
+        prefix = tuple(predicate.value for predicate in (covered[:-1] if last else covered))
+        low = prefix + (last.low,) if last is not None and last.low is not None else prefix
+
+        current = index.lower_bound(low)
+        while current is not None and current.key[:len(prefix)] == prefix:
+            if last is not None:
+                value = current.key[len(prefix)]
+                if last.high is not None and value > last.high:
+                    return
+                if last.matches(value):
+                    yield current
+            else:
+                yield current
+            current = current.successor
+
+    def stats(self, col):
+        """Statistics of a single attribute, recomputed only after the attribute changed.
+
+        Ordered attributes report count, distinct, min and max, numeric ones
+        also range, mean and median. Nominal attributes report count,
+        distinct and the most frequent value with its frequency. Null values
+        are only counted in `nulls`.
+        """
+        container = self.attributes[col]
+        cached = self._stats_cache.get(col)
+
+        if cached is None or cached[0]() is not container or cached[1] != container.version:
+            cached = weakref.ref(container), container.version, self._compute_stats(container)
+            self._stats_cache[col] = cached
+
+        return dict(cached[2])
+
+    def describe(self):
+        return {col: self.stats(col) for col in self.attributes}
+
+    def memory_usage(self, deep=False):
+        """Estimated bytes of resident attributes, compound indexes and row nodes.
+
+        Every attribute and index is split into `tree_nodes`, `elements` and
+        `row_links` (link entries on the element side, the row side is part
+        of `rows`). By default the figures come from the counters containers
+        maintain, see ASA.stats, which is cheap enough to scrape
+        periodically. With `deep` nodes, elements with their keys and rows
+        are walked and measured. Attributes which are not materialized are
+        neither loaded nor counted.
+        """
+        usage = {
+            'attributes': {
+                col: self._container_usage(self.attributes[col], deep) for col in self.attributes.materialized()
+            },
+            'indexes': {attributes: self._container_usage(index, deep) for attributes, index in self.indexes.items()},
+        }
+
+        if deep:
+            usage['rows'] = sum(footprint(rn) for rn in self.rows.values())
+        else:
+            links = sum(part['row_links'] for part in usage['attributes'].values())
+            usage['rows'] = int(len(self.rows) * footprint(RowNode('O0')) + links)
+
+        usage['total'] = usage['rows'] + sum(
+            sum(part.values()) for group in ('attributes', 'indexes') for part in usage[group].values()
+        )
+        return usage
+
+    def _container_usage(self, container, deep):
+        if not deep:
+            stats = container.stats()
+            elements = stats['distinct'] + (container.nulls is not None)
+            return {
+                'tree_nodes': stats['nodes'] * NODE_BYTES if stats['height'] else sys.getsizeof(getattr(container, 'values', {})),
+                'elements': elements * ELEMENT_BYTES,
+                # deduplicated rows link once for many records
+                'row_links': int(min(stats['total'] + stats['nulls'], len(self.rows)) * LINK_BYTES),
+            }
+
+        tree_nodes = 0
+        stack = [container.root] if getattr(container, 'root', None) is not None else []
+        while stack:
+            node = stack.pop()
+            tree_nodes += footprint(node) + sys.getsizeof(node.keys) + sys.getsizeof(node.children)
+            stack.extend(node.children)
+        if hasattr(container, 'values'):
+            tree_nodes += sys.getsizeof(container.values)
+
+        unlinked = sys.getsizeof(vars(ASABaseElem(0)))
+        elements = row_links = 0
+        for element in all_elements(container):
+            elements += sys.getsizeof(element) + unlinked + sys.getsizeof(element.key)
+            row_links += sys.getsizeof(vars(element)) - unlinked
+
+        return {'tree_nodes': tree_nodes, 'elements': elements, 'row_links': row_links}
+
+    @staticmethod
+    def _compute_stats(container):
+        count = sum(element.count for element in container)
+        nulls = container.nulls.count if container.nulls is not None else 0
+        stats = {'count': count, 'nulls': nulls, 'distinct': len(container)}
+
+        if isinstance(container, NominalValues):
+            top = max(container, key=lambda element: element.count, default=None)
+            stats['top'] = top.key if top is not None else None
+            stats['freq'] = top.count if top is not None else 0
+            return stats
+
+        stats['min'] = container.min.key if container.min is not None else None
+        stats['max'] = container.max.key if container.max is not None else None
+
+        if count and isinstance(stats['min'], Real):
+            stats['range'] = stats['max'] - stats['min']
+            stats['mean'] = container.sum / count
+            stats['median'] = container.median
+
+        return stats
+
+    def query(self, *predicates):
+        """Lazily yield ids of rows matching all given predicates.
+
+        Candidate rows come from the most selective positive predicate, its
+        selectivity estimated from value counts. Remaining predicates are
+        checked against values linked to every candidate row, cheapest
+        rejection first and negations last. With a query cache the result is
+        materialized once and served from the cache afterwards.
+        """
+        if self.query_cache is None:
+            return self._query(predicates)
+
+        key = ('query', tuple(sorted(map(repr, predicates))))
+        return iter(self._cached(key, predicates, lambda: list(self._query(predicates))))
+
+    def _query(self, predicates):
+        # attributes stay materialized until the last candidate was checked
+        with self.attributes.pinned():
+            yield from self._filter_rows(predicates)
+
+    def _filter_rows(self, predicates):
+        # also materializes lazily built attributes before row links are checked
+        containers = {predicate.attribute: self.attributes[predicate.attribute] for predicate in predicates}
+
+        positive = []
+        negated = []
+        index_plan = self._index_plan(predicates)
+        covered = index_plan[1] if index_plan is not None else []
+
+        for predicate in predicates:
+            if isinstance(predicate, Not):
+                negated.append(predicate)
+            elif predicate not in covered:
+                elements = predicate.elements(containers[predicate.attribute])
+                positive.append((sum(el.count for el in elements), [predicate], elements))
+
+        if index_plan is not None:
+            positive.append(index_plan)
+
+        positive.sort(key=lambda plan: plan[0])
+
+        if positive:
+            _, _, elements = positive[0]
+            candidates = (row for element in elements for row in linked_rows(element))
+            checks = [predicate for _, plan_predicates, _ in positive[1:] for predicate in plan_predicates] + negated
+        else:
+            candidates = iter(self.rows.items())
+            checks = negated
+
+        for row_id, rn in candidates:
+            if all(self._row_matches(rn, predicate) for predicate in checks):
+                yield row_id
+
+    def bitmap(self, *predicates, executor=None):
+        """RowBitmap of rows matching all given predicates.
+
+        Every predicate is turned into a bitmap over dense row indexes and
+        the bitmaps are combined with vectorized AND / ANDNOT. Predicate
+        bitmaps are built on `executor` when one is given.
+        """
+        key = ('bitmap', tuple(sorted(map(repr, predicates))))
+        return self._cached(key, predicates, lambda: self._bitmap(predicates, executor))
+
+    def _bitmap(self, predicates, executor):
+        result = self._all_rows_bitmap()
+        for predicate_bitmap in self._map(executor, self._predicate_bitmap, predicates):
+            result = result & predicate_bitmap
+
+        return result
+
+    def _all_rows_bitmap(self):
+        if self._all_rows is None or self._all_rows[0] != self._rows_version:
+            self._all_rows = self._rows_version, RowBitmap.from_indices(map(row_index, self.rows), self._next_row)
+
+        return self._all_rows[1]
+
+    def _predicate_bitmap(self, predicate):
+        if isinstance(predicate, Not):
+            return self._all_rows_bitmap() - self._predicate_bitmap(predicate.predicate)
+
+        elements = predicate.elements(self.attributes[predicate.attribute])
+        indices = [self._row_indices(element) for element in elements]
+        return RowBitmap.from_indices(np.concatenate(indices) if indices else [], self._next_row)
+
+    def similar(self, query, k=5, cutoff=0.0, executor=None):
+        """Top `k` rows most similar to `query`, a mapping of attribute values.
+
+        Each query value activates its element and the neighbouring elements
+        of the attribute ASA with weight 1 - |delta| / range, as long as the
+        weight stays above `cutoff`. Nominal attributes activate only the
+        exact value. Activations are summed per row in a dense score array
+        and averaged over the query attributes. Returns (row_id, score)
+        pairs, best first. A deduplicated row takes as many of the `k` places
+        as records it stands for, so the returned rows stand for the records
+        the graph without deduplication would return.
+
+        Attribute activations are independent and are computed on
+        `executor` when one is given, then summed in the calling thread.
+        An ordered attribute is activated by slicing flat numpy arrays of its
+        sorted keys and linked rows, built once per attribute version. That
+        work is mostly numpy, so threads of `executor` may overlap attributes
+        on multi-core hosts; performance_testing/t_wide.py measures whether
+        they do.
+        """
+        key = ('similar', tuple(sorted(query.items(), key=repr)), k, cutoff)
+        attributes = [Eq(col, value) for col, value in query.items()]
+        return list(self._cached(key, attributes, lambda: self._similar(query, k, cutoff, executor)))
+
+    def _similar(self, query, k, cutoff, executor):
+        activations = self._map(executor, lambda item: self._activation(*item, cutoff), query.items())
+        return self._top_similar(activations, k, len(query))
+
+    def _top_similar(self, activations, k, n_attributes):
+        scores = np.zeros(self._next_row)
+        for indices, weights in activations:
+            scores[indices] += weights
+
+        activated = np.flatnonzero(scores)
+        if len(activated) > k > 0:
+            # vectorized preselection keeps the heap at k candidates
+            activated = activated[np.argpartition(scores[activated], -k)[-k:]]
+
+        best = heapq.nlargest(k, activated.tolist(), key=scores.__getitem__)
+        if self._collapsed:
+            best = self._fill_places(best, k)
+
+        return [(f'O{index}', float(scores[index]) / n_attributes) for index in best]
+
+    def _fill_places(self, best, k):
+        # every row takes at least one place, so the k best rows always fill the k places
+        kept = []
+        places = 0
+        for index in best:
+            if places >= k:
+                break
+            kept.append(index)
+            places += self.rows[f'O{index}']._count
+
+        return kept
+
+    def predict(self, df_queries, target, k=5, cutoff=0.0, executor=None):
+        """Predict `target` for every row of `df_queries` from its `k` most similar rows.
+
+        Query values are deduplicated per attribute and each distinct value
+        activates its ASA neighbourhood once; identical queries are scored
+        once. Activations are scattered into score matrices for chunks of
+        distinct queries, restricted to rows activated by the chunk. Nominal
+        targets are predicted by a score weighted vote, ordered ones by a
+        score weighted mean. Queries which activate nothing get None.
+        Per attribute activations are computed on `executor` when one is given.
+        """
+        columns = [col for col in df_queries.columns if col != target]
+        n_rows = self._next_row
+
+        def factorize_and_activate(col):
+            col_codes, uniques = df_queries[col].factorize()
+            return col_codes, [self._activation(col, value, cutoff) for value in uniques]
+
+        codes = []
+        activations = []
+        for col_codes, col_activations in self._map(executor, factorize_and_activate, columns):
+            codes.append(col_codes)
+            activations.append(col_activations)
+
+        if codes:
+            distinct, inverse = np.unique(np.column_stack(codes), axis=0, return_inverse=True)
+        else:
+            distinct, inverse = np.empty((1, 0), dtype=np.int64), np.zeros(len(df_queries), dtype=np.int64)
+
+        target_container = self.attributes[target]
+        target_by_row = np.empty(n_rows, dtype=object)
+        has_target = np.zeros(n_rows, dtype=bool)
+        for element in target_container:
+            target_by_row[self._row_indices(element)] = element.key
+            has_target[self._row_indices(element)] = True
+
+        # deduplicated rows take as many of the k places as records they stand for
+        multiplicity = np.ones(n_rows)
+        for row_id, rn in self._collapsed.items():
+            multiplicity[row_index(row_id)] = rn._count
+
+        nominal_target = isinstance(target_container, NominalValues)
+        chunk = max(1, PREDICT_SCORE_CELLS // max(n_rows, 1))
+        distinct_predictions = []
+
+        for start in range(0, len(distinct), chunk):
+            chunk_codes = distinct[start:start + chunk]
+
+            scattered = []
+            for attribute, col_activations in enumerate(activations):
+                for code in np.unique(chunk_codes[:, attribute]):
+                    if code < 0:
+                        continue
+                    queries = np.flatnonzero(chunk_codes[:, attribute] == code)
+                    scattered.append((queries, *col_activations[code]))
+
+            candidates = np.unique(np.concatenate([indices for _, indices, _ in scattered])) \
+                if scattered else np.empty(0, dtype=np.int64)
+            scores = np.zeros((len(chunk_codes), len(candidates)), dtype=np.float32)
+            for queries, indices, weights in scattered:
+                scores[np.ix_(queries, np.searchsorted(candidates, indices))] += weights
+
+            top = self._top_k_rows(scores, k)
+            for query_scores, top_columns in zip(scores, top):
+                top_columns = top_columns[np.argsort(-query_scores[top_columns], kind='stable')]
+                rows = candidates[top_columns]
+                counts = multiplicity[rows]
+                places = np.clip(k - (np.cumsum(counts) - counts), 0, counts)
+                weights = query_scores[top_columns] * places
+                voting = (weights > 0) & has_target[rows]
+                distinct_predictions.append(self._vote(target_by_row[rows[voting]], weights[voting], nominal_target))
+
+        return [distinct_predictions[index] for index in inverse.ravel()]
+
+    def _cached(self, key, predicates, compute):
+        if self.query_cache is None:
+            return compute()
+
+        versions = self._versions(predicates)
+        found, value = self.query_cache.get(key, versions)
+        if not found:
+            value = compute()
+            self.query_cache.put(key, versions, value)
+
+        return value
+
+    def _versions(self, predicates):
+        # containers are part of the versions, so replacing an attribute invalidates too
+        versions = []
+        for predicate in predicates:
+            container = self.attributes[predicate.attribute]
+            versions.append((predicate.attribute, weakref.ref(container), container.version))
+
+        # negations and empty filters also depend on rows without the attribute
+        if not predicates or any(isinstance(predicate, Not) for predicate in predicates):
+            versions.append(('rows', self._rows_version))
+
+        return tuple(sorted(versions, key=lambda version: repr(version[0])))
+
+    @staticmethod
+    def _map(executor, function, items):
+        # executor is any concurrent.futures style executor sharing this process memory
+        if executor is None:
+            return list(map(function, items))
+
+        return list(executor.map(function, items))
+
+    @staticmethod
+    def _top_k_rows(scores, k):
+        if scores.shape[1] <= k:
+            return np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+
+        return np.argpartition(scores, -k, axis=1)[:, -k:]
+
+    @staticmethod
+    def _vote(values, weights, nominal):
+        if not len(values):
+            return None
+
+        if not nominal:
+            return float(np.average(values.astype(float), weights=weights))
+
+        votes = {}
+        for value, weight in zip(values, weights):
+            votes[value] = votes.get(value, 0.0) + weight
+
+        return max(votes, key=votes.get)
+
+    def _activation(self, col, value, cutoff):
+        container = self.attributes[col]
+        if self._spans_range(container, value):
+            return self._range_activation(col, container, value, cutoff)
+
+        indices = []
+        weights = []
+        for element, weight in self._activated_elements(container, value):
+            rows = self._row_indices(element)
+            indices.append(rows)
+            weights.append(np.full(len(rows), weight))
+
+        if not indices:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        return np.concatenate(indices), np.concatenate(weights)
+
+    def _row_indices(self, element):
+        indices = self._row_index_cache.get(id(element))
+        if indices is None:
+            indices = np.fromiter((row_index(row_id) for row_id, _ in linked_rows(element)), dtype=np.int64)
+            self._row_index_cache[id(element)] = indices
+
+        return indices
+
+    @staticmethod
+    def _spans_range(container, value):
+        # numeric value over an ordered attribute with at least two distinct values
+        return not is_null(value) and isinstance(value, Real) and not isinstance(container, NominalValues) \
+            and container.root is not None and container.min is not container.max
+
+    def _range_activation(self, col, container, value, cutoff):
+        # elements weighted 1 - |delta| / range above `cutoff` form one run of the sorted keys
+        keys, offsets, rows = self._sorted_rows(col, container)
+        value_range = container.max.key - container.min.key
+        radius = (1 - cutoff) * value_range
+
+        # widened by one key on both sides against rounding of the radius, the mask is exact
+        low = max(int(np.searchsorted(keys, value - radius, 'left')) - 1, 0)
+        high = min(int(np.searchsorted(keys, value + radius, 'right')) + 1, len(keys))
+        weights = 1 - np.abs(keys[low:high] - value) / value_range
+        activated = np.flatnonzero(weights > cutoff)
+        if not len(activated):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        first, last = low + activated[0], low + activated[-1] + 1
+        counts = np.diff(offsets[first:last + 1])
+        return rows[offsets[first]:offsets[last]], np.repeat(weights[activated[0]:activated[-1] + 1], counts)
+
+    def _sorted_rows(self, col, container):
+        # sorted keys and linked row indexes flattened, rows of keys[i] are rows[offsets[i]:offsets[i + 1]]
+        cached = self._sorted_rows_cache.get(col)
+        if cached is None or cached[0]() is not container or cached[1] != container.version:
+            keys = []
+            indices = []
+            for element in container:
+                keys.append(element.key)
+                indices.append(self._row_indices(element))
+
+            offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+            np.cumsum([len(element_rows) for element_rows in indices], out=offsets[1:])
+            rows = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+            cached = weakref.ref(container), container.version, np.asarray(keys), offsets, rows
+            self._sorted_rows_cache[col] = cached
+
+        return cached[2:]
+
+    @staticmethod
+    def _activated_elements(container, value):
+        # nominal, non numeric or single valued attributes activate only the exact value
+        if is_null(value):
+            # missing query value activates nothing
+            return
+
+        element, _ = container.search(value)
+        if element is not False:
+            yield element, 1.0
+
+    @staticmethod
+    def _row_matches(rn, predicate):
+        if isinstance(predicate, Not):
+            return not AGDS._row_matches(rn, predicate.predicate)
+
+        element = getattr(rn, predicate.attribute, None)
+        return element is not None and not is_null(element.key) and predicate.matches(element.key)
+
+    def _container(self, col, val):
+        if col not in self.attributes:
+            ordered = isinstance(val, Real) and not isinstance(val, bool)
+            self.attributes[col] = self._ordered() if ordered else NominalValues()
+
+        return self.attributes[col]
+
+    def _link(self, rn, row_id, col, val):
+        container = self._container(col, val)
+        for _ in range(rn._count):
+            inserted = container.insert(val)
+
+        setattr(rn, col, inserted)
+        setattr(inserted, row_id, rn)
+        self._row_index_cache.pop(id(inserted), None)
+
+    def _unlink(self, rn, row_id, col):
+        element = getattr(rn, col)
+        delattr(element, row_id)
+        delattr(rn, col)
+        self._row_index_cache.pop(id(element), None)
+
+        # element is removed from the ASA when its count drops to zero
+        for _ in range(rn._count):
+            self.attributes[col].delete(element.key)
 
     def __str__(self):
         return f'attributes = {self.attributes} \n rows: {self.rows}'
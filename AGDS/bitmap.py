@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class RowBitmap:
+    """Set of dense row indexes kept as a numpy packed bit array.
+
+    AND (&), OR (|) and ANDNOT (-) run vectorized over whole bytes, which is
+    much cheaper than intersecting Python sets of row nodes.
+    """
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def from_indices(cls, indices, size):
+        dense = np.zeros(size, dtype=bool)
+        if not isinstance(indices, np.ndarray):
+            indices = np.fromiter(indices, dtype=np.int64)
+
+        dense[indices] = True
+        return cls(np.packbits(dense), size)
+
+    @classmethod
+    def full(cls, size):
+        return cls.from_indices(range(size), size)
+
+    def _aligned(self, other):
+        if self.size == other.size:
+            return self.bits, other.bits, self.size
+
+        size = max(self.size, other.size)
+        n_bytes = (size + 7) // 8
+        left = np.zeros(n_bytes, dtype=np.uint8)
+        right = np.zeros(n_bytes, dtype=np.uint8)
+        left[:len(self.bits)] = self.bits
+        right[:len(other.bits)] = other.bits
+        return left, right, size
+
+    def __and__(self, other):
+        left, right, size = self._aligned(other)
+        return RowBitmap(np.bitwise_and(left, right), size)
+
+    def __or__(self, other):
+        left, right, size = self._aligned(other)
+        return RowBitmap(np.bitwise_or(left, right), size)
+
+    def __sub__(self, other):
+        left, right, size = self._aligned(other)
+        return RowBitmap(np.bitwise_and(left, np.invert(right)), size)
+
+    def __eq__(self, other):
+        if not isinstance(other, RowBitmap):
+            return NotImplemented
+        left, right, _ = self._aligned(other)
+        return bool(np.array_equal(left, right))
+
+    def __len__(self):
+        return int(np.unpackbits(self.bits).sum())
+
+    def __iter__(self):
+        return iter(self.indices().tolist())
+
+    def __contains__(self, index):
+        if not 0 <= index < self.size:
+            return False
+        return bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
+
+    def indices(self):
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size))
+
+    def __repr__(self):
+        return f'RowBitmap(size={self.size}, count={len(self)})'
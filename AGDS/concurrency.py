@@ -0,0 +1,52 @@
+import threading
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from ASA.concurrency import RWLock, locked
+
+READ_METHODS = (
+    'query', 'bitmap', 'similar', 'predict', 'stats', 'describe', 'memory_usage',
+    'multiplicity', 'original_indices', 'operation_counters',
+)
+WRITE_METHODS = (
+    'build_from_pandas', 'build_from_triples', 'build_from_records', 'build_from_sparse',
+    'add_row', 'delete_row', 'update_row', 'create_index', 'drop_index',
+)
+
+
+class ConcurrentAGDS(AGDS):
+    """AGDS serving queries from many threads while another thread ingests.
+
+    Queries, similarity, prediction and statistics run under the read side
+    of `lock` and row mutations and builds under its write side, so readers
+    never see a half applied split or rebalance. Query results are fully
+    collected before the read lock is released. Lazy attribute
+    materialization, which readers may trigger, is serialized separately.
+
+    write_batch applies many mutations under a single write lock
+    acquisition, `lock.metrics()` reports contention and batching.
+    """
+
+    def __init__(self, *args, lock=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = lock if lock is not None else RWLock()
+        self.attributes.lock = threading.RLock()
+
+    def write_batch(self, operations):
+        """Apply (method name, *arguments) operations holding the write lock once.
+
+        Returns the results in order, e.g. row ids of added rows.
+        """
+        operations = list(operations)
+        for name, *_ in operations:
+            if name not in WRITE_METHODS:
+                raise ValueError(f'{name!r} is not a write operation')
+
+        with self.lock.batch(len(operations)):
+            return [getattr(self, name)(*arguments) for name, *arguments in operations]
+
+
+for _name in READ_METHODS:
+    setattr(ConcurrentAGDS, _name, locked(getattr(AGDS, _name), 'read'))
+
+for _name in WRITE_METHODS:
+    setattr(ConcurrentAGDS, _name, locked(getattr(AGDS, _name), 'write'))
@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from collections.abc import MutableMapping
+
+from AGDS.spill import SpilledSource
+
+
+class LazyAttributes(MutableMapping):
+    """Mapping of attribute name to value container built on first access.
+
+    Deferred attributes keep only their source (values and row ids) until
+    they are looked up, then `materialize(col, source)` builds the container.
+    With `max_materialized` or `max_bytes` (measured by `size_of(container)`)
+    only the most recently used containers are kept, older ones are turned
+    back into sources through `release(col, container)` and, with a `spill`
+    store, written to disk until they are needed again.
+
+    Eviction is deferred while any `pinned()` block is open, so an operation
+    reading row links of several attributes never has one of them released
+    under it; the budget is enforced again when the last block ends.
+
+    `lock` guards lookups, materialization and eviction. It does nothing by
+    default and is replaced by a real lock when readers on several threads
+    share the mapping, see AGDS.concurrency.
+    """
+
+    def __init__(self, materialize, release, max_materialized=None, max_bytes=None, size_of=None, spill=None):
+        self._materialize = materialize
+        self._release = release
+        self.max_materialized = max_materialized
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.spill = spill
+
+        self._columns = {}
+        self._containers = OrderedDict()
+        self._sources = {}
+        # col -> (container version, estimated bytes)
+        self._sizes = {}
+        self.evictions = {}
+        self.lock = nullcontext()
+        self._pins = 0
+
+    def defer(self, col, source):
+        with self.lock:
+            self._containers.pop(col, None)
+            self._sources[col] = source
+            self._columns[col] = None
+
+    @contextmanager
+    def pinned(self):
+        with self.lock:
+            self._pins += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._pins -= 1
+                self._evict()
+
+    def is_materialized(self, col):
+        return col in self._containers
+
+    def materialized(self):
+        return list(self._containers)
+
+    def spilled(self):
+        return [col for col, source in self._sources.items() if isinstance(source, SpilledSource)]
+
+    def resident_bytes(self):
+        return {col: self._size(col, container) for col, container in self._containers.items()}
+
+    def __getitem__(self, col):
+        with self.lock:
+            if col in self._containers:
+                self._containers.move_to_end(col)
+                return self._containers[col]
+
+            if col not in self._sources:
+                raise KeyError(col)
+
+            source = self._sources.pop(col)
+            if isinstance(source, SpilledSource):
+                source = self.spill.read(source)
+
+            container = self._materialize(col, source)
+            self._containers[col] = container
+            self._evict()
+            return container
+
+    def __setitem__(self, col, container):
+        with self.lock:
+            self._sources.pop(col, None)
+            self._containers[col] = container
+            self._containers.move_to_end(col)
+            self._columns[col] = None
+            self._evict()
+
+    def __delitem__(self, col):
+        with self.lock:
+            del self._columns[col]
+            self._containers.pop(col, None)
+            self._sources.pop(col, None)
+            self._sizes.pop(col, None)
+
+    def __contains__(self, col):
+        return col in self._columns
+
+    def __iter__(self):
+        return iter(list(self._columns))
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __repr__(self):
+        return repr({col: self._containers.get(col, 'deferred') for col in self._columns})
+
+    def _size(self, col, container):
+        cached = self._sizes.get(col)
+        if cached is None or cached[0] != container.version:
+            cached = container.version, self.size_of(container)
+            self._sizes[col] = cached
+
+        return cached[1]
+
+    def _over_budget(self):
+        if self.max_materialized is not None and len(self._containers) > self.max_materialized:
+            return True
+
+        if self.max_bytes is not None:
+            return sum(self.resident_bytes().values()) > self.max_bytes
+
+        return False
+
+    def _evict(self):
+        # the most recently used attribute always stays, even when it alone exceeds the budget
+        while not self._pins and len(self._containers) > 1 and self._over_budget():
+            col, container = self._containers.popitem(last=False)
+            self._sizes.pop(col, None)
+
+            source = self._release(col, container)
+            self._sources[col] = self.spill.write(source) if self.spill is not None else source
+            self.evictions[col] = self.evictions.get(col, 0) + 1
@@ -0,0 +1,98 @@
+from ASA.ASA_tree_and_d_queue import is_null
+
+
+class Predicate:
+    """Condition on a single AGDS attribute.
+
+    `elements` returns value elements of the attribute container which satisfy
+    the condition, `matches` checks an already known value key. Null values
+    (None, NaN, NA) satisfy no condition, only its negation.
+    """
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+
+    def elements(self, container):
+        raise NotImplementedError
+
+    def matches(self, key):
+        raise NotImplementedError
+
+    def __invert__(self):
+        return Not(self)
+
+
+class Eq(Predicate):
+    def __init__(self, attribute, value):
+        super().__init__(attribute)
+        self.value = value
+
+    def elements(self, container):
+        if is_null(self.value):
+            return []
+
+        element, _ = container.search(self.value)
+        return [element] if element is not False else []
+
+    def matches(self, key):
+        return key == self.value
+
+    def __repr__(self):
+        return f'Eq({self.attribute!r}, {self.value!r})'
+
+
+class In(Predicate):
+    def __init__(self, attribute, values):
+        super().__init__(attribute)
+        self.values = set(values)
+
+    def elements(self, container):
+        found = (container.search(value)[0] for value in self.values if not is_null(value))
+        return [element for element in found if element is not False]
+
+    def matches(self, key):
+        return key in self.values
+
+    def __repr__(self):
+        return f'In({self.attribute!r}, {sorted(self.values, key=repr)!r})'
+
+
+class Range(Predicate):
+    def __init__(self, attribute, low=None, high=None, include_low=True, include_high=True):
+        super().__init__(attribute)
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+
+    def elements(self, container):
+        if not hasattr(container, 'scan'):
+            raise TypeError(f'Range predicate needs an ordered attribute, {self.attribute!r} is nominal')
+
+        return list(container.scan(self.low, self.high, self.include_low, self.include_high))
+
+    def matches(self, key):
+        if self.low is not None and (key < self.low or (not self.include_low and key == self.low)):
+            return False
+        if self.high is not None and (key > self.high or (not self.include_high and key == self.high)):
+            return False
+        return True
+
+    def __repr__(self):
+        return f'Range({self.attribute!r}, {self.low!r}, {self.high!r}, {self.include_low}, {self.include_high})'
+
+
+class Not(Predicate):
+    def __init__(self, predicate):
+        super().__init__(predicate.attribute)
+        self.predicate = predicate
+
+    def matches(self, key):
+        return not self.predicate.matches(key)
+
+    def __invert__(self):
+        return self.predicate
+
+    def __repr__(self):
+        return f'Not({self.predicate!r})'
+
@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    # rough footprint of a cached result, numpy backed objects report their buffers
+    if hasattr(value, 'bits'):
+        return sys.getsizeof(value) + value.bits.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """Bounded LRU cache of AGDS query results.
+
+    Every entry remembers versions of the attributes its query touched and
+    is dropped on lookup once any of them changed. Entries are evicted in
+    least recently used order when `max_entries` or `max_bytes` is exceeded
+    and expire after `ttl` seconds when a ttl is given. Safe to share
+    between threads.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            entry_versions, value, size, created = entry
+            if entry_versions != versions or (self.ttl is not None and self.clock() - created > self.ttl):
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, versions, value):
+        size = estimate_size(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = versions, value, size, self.clock()
+            self.bytes += size
+
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def metrics(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def _remove(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self.bytes -= size
@@ -0,0 +1,165 @@
+import asyncio
+from contextlib import nullcontext
+
+
+class AGDSService:
+    """asyncio front end of an AGDS.
+
+    Filter, similarity and statistics requests are queued and served in
+    batches by a single worker task. Identical requests waiting in the same
+    batch are answered by one computation, and filter requests share
+    predicate bitmaps, so a predicate used by many concurrent filters is
+    evaluated against its attribute once per batch. Similarity requests
+    share value activations the same way. Batches run on `executor` (the
+    loop's default executor when None) so the event loop never blocks on
+    graph traversal.
+
+    At most `max_pending` requests wait in the queue. Further callers are
+    suspended until there is room, which applies back-pressure to clients.
+    When the graph is also written from other threads, serve a
+    ConcurrentAGDS, batches then run under its read lock.
+    """
+
+    def __init__(self, agds, executor=None, max_pending=1024, max_batch=64):
+        self.agds = agds
+        self.executor = executor
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+
+        self._queue = None
+        self._worker = None
+
+        self.requests = 0
+        self.batches = 0
+        self.computed = 0
+        self.coalesced = 0
+
+    async def start(self):
+        if self._worker is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._worker = asyncio.create_task(self._serve())
+
+    async def stop(self):
+        # waits for queued requests to be answered
+        if self._worker is None:
+            return
+
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def query(self, *predicates):
+        # ids of rows matching all predicates, in row order
+        return await self._submit(('query', tuple(sorted(map(repr, predicates)))), predicates)
+
+    async def similar(self, query, k=5, cutoff=0.0):
+        return await self._submit(('similar', tuple(sorted(query.items(), key=repr)), k, cutoff), (query, k, cutoff))
+
+    async def stats(self, col):
+        return await self._submit(('stats', col), col)
+
+    def metrics(self):
+        return {
+            'pending': self._queue.qsize() if self._queue is not None else 0,
+            'requests': self.requests,
+            'batches': self.batches,
+            'computed': self.computed,
+            'coalesced': self.coalesced,
+        }
+
+    async def _submit(self, key, arguments):
+        if self._worker is None:
+            raise RuntimeError('service is not started')
+
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queue.put((key, arguments, future))
+        return await future
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            waiting = {}
+            unique = {}
+            for key, arguments, future in batch:
+                waiting.setdefault(key, []).append(future)
+                unique.setdefault(key, arguments)
+
+            self.batches += 1
+            self.computed += len(unique)
+            self.coalesced += len(batch) - len(unique)
+
+            try:
+                results = await loop.run_in_executor(self.executor, self._run_batch, unique)
+            except Exception as error:
+                results = {key: (False, error) for key in unique}
+
+            for key, futures in waiting.items():
+                ok, value = results[key]
+                for future in futures:
+                    if future.cancelled():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run_batch(self, unique):
+        # key -> (succeeded, result or exception), computed in the executor
+        lock = getattr(self.agds, 'lock', None)
+        results = {}
+        bitmaps = {}
+        activations = {}
+
+        with lock.read() if lock is not None else nullcontext():
+            for key, arguments in unique.items():
+                try:
+                    if key[0] == 'query':
+                        results[key] = True, self._filter(arguments, bitmaps)
+                    elif key[0] == 'similar':
+                        results[key] = True, self._similar(*arguments, activations)
+                    else:
+                        results[key] = True, self.agds.stats(arguments)
+                except Exception as error:
+                    results[key] = False, error
+
+        return results
+
+    def _filter(self, predicates, bitmaps):
+        result = self.agds._all_rows_bitmap()
+
+        for predicate in predicates:
+            key = repr(predicate)
+            if key not in bitmaps:
+                bitmaps[key] = self.agds._predicate_bitmap(predicate)
+            result = result & bitmaps[key]
+
+        return [f'O{index}' for index in result]
+
+    def _similar(self, query, k, cutoff, activations):
+        activated = []
+        for col, value in query.items():
+            key = col, repr(value), cutoff
+            if key not in activations:
+                activations[key] = self.agds._activation(col, value, cutoff)
+            activated.append(activations[key])
+
+        return self.agds._top_similar(activated, k, len(query))
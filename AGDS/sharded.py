@@ -0,0 +1,261 @@
+import heapq
+import multiprocessing
+from numbers import Real
+
+import numpy as np
+
+from AGDS.AGDS_mixed_implementation import AGDS, ORDERED_DTYPE_KINDS, row_index
+from ASA.ASA_tree_and_d_queue import ASASnapshot
+from ASA.nominal_values import NominalValues
+
+
+def _serve(connection):
+    # worker loop, (method, args, kwargs) in, (succeeded, result or exception) out, None stops it
+    agds = AGDS()
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        name, args, kwargs = message
+        try:
+            result = True, _HANDLERS.get(name, _call)(agds, name, *args, **kwargs)
+        except Exception as error:
+            result = False, error
+        connection.send(result)
+
+    connection.close()
+
+
+def _call(agds, name, *args, **kwargs):
+    return getattr(agds, name)(*args, **kwargs)
+
+
+def _add_row(agds, name, number, mapping):
+    # the coordinator numbers rows, so ids stay unique over all shards
+    agds._next_row = number
+    return agds.add_row(mapping)
+
+
+def _append_frame(agds, name, part, nominal, row_numbers):
+    # rows of a later build join the existing containers, a second build_from_pandas would replace them
+    for col in part.columns:
+        if col not in agds.attributes:
+            agds.attributes[col] = NominalValues() if col in nominal else agds._ordered()
+
+    for number, record in zip(row_numbers, part.to_dict('records')):
+        agds._next_row = number
+        agds.add_row(record)
+
+
+def _query(agds, name, *predicates):
+    return np.fromiter((row_index(row_id) for row_id in agds.query(*predicates)), dtype=np.int64)
+
+
+def _counts(agds, name, col):
+    # sorted keys with their counts, insertion order for nominal attributes
+    if col not in agds.attributes:
+        return None
+
+    container = agds.attributes[col]
+    nulls = container.nulls.count if container.nulls is not None else 0
+    keys, counts = [], []
+    for element in container:
+        keys.append(element.key)
+        counts.append(element.count)
+
+    return isinstance(container, NominalValues), keys, counts, nulls
+
+
+def _rows(agds, name):
+    return len(agds.rows)
+
+
+def _columns(agds, name):
+    return list(agds.attributes)
+
+
+_HANDLERS = {'add_row': _add_row, 'append_frame': _append_frame, 'query': _query, 'counts': _counts, 'rows': _rows, 'columns': _columns}
+
+
+class ShardedAGDS:
+    """Rows of one logical AGDS partitioned over `shards` local worker processes.
+
+    Row `O{i}` lives in shard i % shards, every shard holds an AGDS of its
+    own rows and talks to the coordinator over a pipe. Queries are sent to
+    all shards before any answer is read, so shards filter in parallel, and
+    matching rows are concatenated in row order. stats and quantile are
+    exact: each shard sends the sorted keys and counts of an attribute and
+    the streams are merged by count, the way a single tree would count
+    them. Only the most frequent value of a nominal attribute may differ on
+    ties.
+
+    Deduplication is per shard and similarity search is not offered, its
+    activations are scaled by the value range a single shard sees.
+    """
+
+    def __init__(self, shards=2, context=None):
+        context = context if context is not None else multiprocessing.get_context()
+        self.shards = shards
+        self._next_row = 0
+        self._connections = []
+        self._processes = []
+
+        for _ in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return sum(self._broadcast('rows'))
+
+    def close(self):
+        for connection, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                connection.send(None)
+            connection.close()
+            process.join()
+
+        self._connections = []
+        self._processes = []
+
+    def build_from_pandas(self, pd_dataframe, nominal=None, **kwargs):
+        """Partition `pd_dataframe` by row position and build every shard from its part.
+
+        Nominal columns are decided on the whole frame, so all shards store
+        an attribute in the same kind of container. The first build creates
+        the shard graphs, later builds append their rows after the existing
+        ones; `kwargs` such as `deduplicate` or `lazy` apply to the first
+        build only.
+        """
+        if nominal is None:
+            nominal = [col for col in pd_dataframe.columns if pd_dataframe[col].dtype.kind not in ORDERED_DTYPE_KINDS]
+        if self._next_row and kwargs:
+            raise ValueError(f'{sorted(kwargs)} only apply to the first build')
+
+        positions = np.arange(len(pd_dataframe)) + self._next_row
+        for shard, connection in enumerate(self._connections):
+            selected = positions % self.shards == shard
+            part = pd_dataframe[selected]
+            row_numbers = positions[selected].tolist()
+            if self._next_row:
+                connection.send(('append_frame', (part, nominal, row_numbers), {}))
+            else:
+                connection.send(('build_from_pandas', (part, nominal), dict(kwargs, row_numbers=row_numbers)))
+        self._collect(self._connections)
+
+        self._next_row += len(pd_dataframe)
+
+    def add_row(self, mapping):
+        number = self._next_row
+        self._next_row += 1
+        return self._request(number % self.shards, 'add_row', number, mapping)
+
+    def delete_row(self, row_id):
+        self._request(self._shard(row_id), 'delete_row', row_id)
+
+    def update_row(self, row_id, changes):
+        self._request(self._shard(row_id), 'update_row', row_id, changes)
+
+    def create_index(self, *attributes):
+        self._broadcast('create_index', *attributes)
+
+    def drop_index(self, *attributes):
+        self._broadcast('drop_index', *attributes)
+
+    def query(self, *predicates):
+        # ids of rows matching all predicates, in row order
+        indexes = np.sort(np.concatenate(self._broadcast('query', *predicates)))
+        return [f'O{index}' for index in indexes.tolist()]
+
+    def stats(self, col):
+        """Statistics of attribute `col` over all shards, the same as AGDS.stats."""
+        nominal, keys, counts, nulls = self._merged_counts(col)
+        stats = {'count': sum(counts), 'nulls': nulls, 'distinct': len(keys)}
+
+        if nominal:
+            top = max(range(len(keys)), key=counts.__getitem__, default=None)
+            stats['top'] = keys[top] if top is not None else None
+            stats['freq'] = counts[top] if top is not None else 0
+            return stats
+
+        merged = ASASnapshot.from_counts(keys, counts, nulls)
+        stats['min'] = merged.min.key if keys else None
+        stats['max'] = merged.max.key if keys else None
+
+        if stats['count'] and isinstance(stats['min'], Real):
+            stats['range'] = stats['max'] - stats['min']
+            stats['mean'] = merged.sum / stats['count']
+            stats['median'] = merged.median
+
+        return stats
+
+    def describe(self):
+        columns = {}
+        for part in self._broadcast('columns'):
+            columns.update(dict.fromkeys(part))
+        return {col: self.stats(col) for col in columns}
+
+    def quantile(self, col, q):
+        # linearly interpolated quantile of an ordered attribute, nulls are skipped
+        nominal, keys, counts, nulls = self._merged_counts(col)
+        if nominal:
+            raise TypeError(f'quantile of nominal attribute {col!r}')
+
+        return ASASnapshot.from_counts(keys, counts, nulls).quantile(q)
+
+    def _merged_counts(self, col):
+        parts = [part for part in self._broadcast('counts', col) if part is not None]
+        if not parts:
+            raise KeyError(col)
+
+        nominal = parts[0][0]
+        nulls = sum(part[3] for part in parts)
+
+        if nominal:
+            merged = {}
+            for _, keys, counts, _ in parts:
+                for key, count in zip(keys, counts):
+                    merged[key] = merged.get(key, 0) + count
+            return nominal, list(merged), list(merged.values()), nulls
+
+        keys, counts = [], []
+        streams = [zip(part[1], part[2]) for part in parts]
+        for key, count in heapq.merge(*streams, key=lambda pair: pair[0]):
+            if keys and keys[-1] == key:
+                counts[-1] += count
+            else:
+                keys.append(key)
+                counts.append(count)
+
+        return nominal, keys, counts, nulls
+
+    def _shard(self, row_id):
+        return row_index(row_id) % self.shards
+
+    def _request(self, shard, name, *args, **kwargs):
+        self._connections[shard].send((name, args, kwargs))
+        return self._collect([self._connections[shard]])[0]
+
+    def _broadcast(self, name, *args, **kwargs):
+        for connection in self._connections:
+            connection.send((name, args, kwargs))
+        return self._collect(self._connections)
+
+    @staticmethod
+    def _collect(connections):
+        # every answer is read before the first failure is raised, pipes stay in step
+        answers = [connection.recv() for connection in connections]
+        for ok, value in answers:
+            if not ok:
+                raise value
+        return [value for _, value in answers]
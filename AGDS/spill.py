@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import numpy as np
+
+# value types stored as plain numpy columns, everything else is pickled
+COLUMNAR_TYPES = {int: np.int64, float: np.float64, str: np.str_}
+
+
+class SpilledSource:
+    def __init__(self, values_path, rows_path, nominal, columnar):
+        self.values_path = values_path
+        self.rows_path = rows_path
+        self.nominal = nominal
+        self.columnar = columnar
+
+    def __repr__(self):
+        return f'SpilledSource({self.values_path})'
+
+
+class SpillStore:
+    """Keeps sources of evicted attributes in .npy files on local disk.
+
+    Values of a single int, float or str type are written as numpy columns
+    and memory-mapped on reload, other values are pickled. Row ids are
+    stored as their dense integer indexes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory if directory is not None else tempfile.mkdtemp(prefix='agds_spill_')
+        os.makedirs(self.directory, exist_ok=True)
+        self._counter = 0
+
+    def write(self, source):
+        values, row_ids, nominal = source
+
+        self._counter += 1
+        base = os.path.join(self.directory, f'attribute_{self._counter}')
+        values_path, rows_path = f'{base}_values.npy', f'{base}_rows.npy'
+
+        value_types = {type(value) for value in values}
+        columnar = len(value_types) == 1 and next(iter(value_types)) in COLUMNAR_TYPES
+        try:
+            array = np.array(values, dtype=COLUMNAR_TYPES[value_types.pop()]) if columnar else None
+        except OverflowError:
+            columnar = False
+
+        if not columnar:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+
+        np.save(values_path, array, allow_pickle=not columnar)
+        np.save(rows_path, np.array([int(row_id[1:]) for row_id in row_ids], dtype=np.int64))
+
+        return SpilledSource(values_path, rows_path, nominal, columnar)
+
+    def read(self, spilled):
+        mmap_mode = 'r' if spilled.columnar else None
+        values = np.load(spilled.values_path, mmap_mode=mmap_mode, allow_pickle=not spilled.columnar).tolist()
+        row_ids = [f'O{index}' for index in np.load(spilled.rows_path, mmap_mode='r').tolist()]
+
+        os.remove(spilled.values_path)
+        os.remove(spilled.rows_path)
+        return values, row_ids, spilled.nominal
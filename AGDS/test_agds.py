@@ -0,0 +1,175 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from ASA.ASA_tree_and_d_queue import ASA
+from ASA.instrumentation import InstrumentedASA
+from ASA.nominal_values import NominalValues
+
+
+@pytest.fixture()
+def small_agds():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({
+        'length': [5.1, 4.9, 5.1, 6.3],
+        'species': ['setosa', 'setosa', 'virginica', 'virginica'],
+    }))
+    return agds
+
+
+def keys_and_counts(asa):
+    return [(el.key, el.count) for el in asa.sorted_d_queue]
+
+
+def test_build_from_pandas_should_link_rows_and_values(small_agds):
+    row = small_agds.rows['O2']
+
+    assert row.length.key == 5.1
+    assert row.species.key == 'virginica'
+    assert getattr(row.length, 'O2') is row
+    assert keys_and_counts(small_agds.attributes['length']) == [(4.9, 1), (5.1, 2), (6.3, 1)]
+
+
+def test_add_row_should_insert_values_and_link_new_row(small_agds):
+    row_id = small_agds.add_row({'length': 4.9, 'species': 'versicolor'})
+
+    assert row_id == 'O4'
+    row = small_agds.rows[row_id]
+
+    assert row.length.count == 2
+    assert getattr(row.species, row_id) is row
+    assert small_agds.attributes['species'].search('versicolor')[0].count == 1
+
+
+def test_add_row_should_create_missing_attribute():
+    agds = AGDS()
+    row_id = agds.add_row({'width': 3})
+
+    assert row_id == 'O0'
+    assert keys_and_counts(agds.attributes['width']) == [(3, 1)]
+
+
+def test_delete_row_should_decrease_counts_and_free_unused_values(small_agds):
+    small_agds.delete_row('O3')
+
+    assert 'O3' not in small_agds.rows
+    assert keys_and_counts(small_agds.attributes['length']) == [(4.9, 1), (5.1, 2)]
+    assert small_agds.attributes['species'].search('virginica')[0].count == 1
+
+    virginica, _ = small_agds.attributes['species'].search('virginica')
+    assert not hasattr(virginica, 'O3')
+    assert hasattr(virginica, 'O2')
+
+
+def test_delete_row_should_raise_for_unknown_row(small_agds):
+    with pytest.raises(KeyError):
+        small_agds.delete_row('O10')
+
+
+def test_deleted_row_id_should_not_be_reused(small_agds):
+    small_agds.delete_row('O3')
+
+    assert small_agds.add_row({'length': 1.0}) == 'O4'
+
+
+def test_update_row_should_move_links_between_values(small_agds):
+    small_agds.update_row('O0', {'length': 7.0, 'species': 'setosa'})
+
+    row = small_agds.rows['O0']
+    five_one, _ = small_agds.attributes['length'].search(5.1)
+
+    assert row.length.key == 7.0
+    assert getattr(row.length, 'O0') is row
+    assert not hasattr(five_one, 'O0')
+    assert keys_and_counts(small_agds.attributes['length']) == [(4.9, 1), (5.1, 1), (6.3, 1), (7.0, 1)]
+    assert sorted((el.key, el.count) for el in small_agds.attributes['species']) == [('setosa', 2), ('virginica', 2)]
+
+
+def test_delete_all_rows_should_leave_empty_attributes(small_agds):
+    for row_id in list(small_agds.rows):
+        small_agds.delete_row(row_id)
+
+    assert small_agds.rows == {}
+    assert small_agds.attributes['length'].root is None
+    assert len(small_agds.attributes['species']) == 0
+
+
+def test_build_from_pandas_should_detect_nominal_columns(small_agds):
+    assert isinstance(small_agds.attributes['length'], ASA)
+    assert isinstance(small_agds.attributes['species'], NominalValues)
+
+
+def test_build_from_pandas_should_accept_nominal_schema():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'code': [3, 1, 3], 'name': ['b', 'a', 'c']}), nominal=['code'])
+
+    assert isinstance(agds.attributes['code'], NominalValues)
+    assert isinstance(agds.attributes['name'], ASA)
+    assert agds.attributes['code'].search(3)[0].count == 2
+    assert agds.attributes['name'].min.key == 'a'
+
+
+def test_add_row_should_pick_container_for_new_attribute_by_value_type():
+    agds = AGDS()
+    agds.add_row({'width': 3, 'color': 'red', 'flag': True})
+
+    assert isinstance(agds.attributes['width'], ASA)
+    assert isinstance(agds.attributes['color'], NominalValues)
+    assert isinstance(agds.attributes['flag'], NominalValues)
+
+
+def test_rows_with_missing_values_should_link_to_null_bucket():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'length': [1.0, None, float('nan'), 2.0]}))
+    length = agds.attributes['length']
+
+    assert len(length) == 2
+    assert length.nulls.count == 2
+    assert agds.rows['O1'].length is length.nulls
+
+    agds.delete_row('O1')
+    agds.update_row('O2', {'length': 3.0})
+
+    assert length.nulls is None
+    assert [(el.key, el.count) for el in length] == [(1.0, 1), (2.0, 1), (3.0, 1)]
+
+
+def test_instrumented_graph_should_count_ordered_container_work():
+    df = pd.DataFrame({'length': [3, 1, 2, 5, 4], 'color': ['a', 'b', 'a', 'b', 'c']})
+    agds = AGDS(instrument=True)
+    agds.build_from_pandas(df)
+
+    counters = agds.operation_counters()
+
+    assert isinstance(agds.attributes['length'], InstrumentedASA)
+    assert counters['relinks'] == 4
+    assert counters['split_and_propagate'] > 0
+    assert AGDS().operation_counters() == {}
+
+
+@pytest.mark.parametrize('deep', [False, True])
+def test_memory_usage_should_break_down_resident_attributes(deep):
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'length': [3, 1, 2, 1], 'color': ['a', 'b', 'a', 'b']}))
+    agds.create_index('color', 'length')
+
+    usage = agds.memory_usage(deep=deep)
+
+    assert set(usage['attributes']) == {'length', 'color'}
+    assert set(usage['indexes']) == {('color', 'length')}
+    for part in [*usage['attributes'].values(), *usage['indexes'].values()]:
+        assert set(part) == {'tree_nodes', 'elements', 'row_links'}
+        assert part['tree_nodes'] > 0 and part['elements'] > 0 and part['row_links'] >= 0
+    assert usage['rows'] > 0
+    assert usage['total'] == usage['rows'] + sum(
+        sum(part.values()) for group in ('attributes', 'indexes') for part in usage[group].values()
+    )
+
+
+def test_memory_usage_should_not_materialize_lazy_attributes():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'length': [3, 1], 'color': ['a', 'b']}), lazy=True)
+    agds.attributes['length']
+
+    assert set(agds.memory_usage()['attributes']) == {'length'}
+    assert agds.attributes.materialized() == ['length']
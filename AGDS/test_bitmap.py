@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.bitmap import RowBitmap
+from AGDS.query import Eq, In, Not, Range
+
+
+def test_from_indices_should_keep_given_rows():
+    bitmap = RowBitmap.from_indices([0, 3, 9], 12)
+
+    assert list(bitmap) == [0, 3, 9]
+    assert len(bitmap) == 3
+    assert 3 in bitmap
+    assert 4 not in bitmap
+    assert 20 not in bitmap
+
+
+@pytest.mark.parametrize('size', [0, 1, 8, 13])
+def test_full_bitmap_should_contain_every_row(size):
+    assert list(RowBitmap.full(size)) == list(range(size))
+
+
+def test_set_operations_should_match_python_sets():
+    left_rows, right_rows = {1, 2, 5, 8, 11}, {2, 3, 8, 12}
+    left = RowBitmap.from_indices(left_rows, 13)
+    right = RowBitmap.from_indices(right_rows, 13)
+
+    assert set(left & right) == left_rows & right_rows
+    assert set(left | right) == left_rows | right_rows
+    assert set(left - right) == left_rows - right_rows
+
+
+def test_set_operations_should_align_different_sizes():
+    short = RowBitmap.from_indices([1, 4], 5)
+    long = RowBitmap.from_indices([4, 17], 20)
+
+    assert list(short | long) == [1, 4, 17]
+    assert list(long - short) == [17]
+    assert (short & long).size == 20
+    assert short == RowBitmap.from_indices([1, 4], 20)
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        'length': [5.1, 4.9, 6.3, 5.8, 5.0, 6.0],
+        'species': ['setosa', 'setosa', 'virginica', 'virginica', 'setosa', 'versicolor'],
+    }))
+    return graph
+
+
+@pytest.mark.parametrize(
+    'predicates',
+    [
+        [],
+        [Eq('species', 'setosa')],
+        [Range('length', 5, 6)],
+        [Range('length', 5, 6), In('species', ['setosa', 'versicolor'])],
+        [Range('length', 5, 6), Not(Eq('species', 'setosa'))],
+        [Not(Not(Eq('species', 'virginica')))],
+    ]
+)
+def test_agds_bitmap_should_agree_with_query(agds, predicates):
+    expected = {int(row_id[1:]) for row_id in agds.query(*predicates)}
+
+    assert set(agds.bitmap(*predicates)) == expected
+
+
+def test_agds_bitmap_should_skip_deleted_rows(agds):
+    agds.delete_row('O1')
+
+    assert list(agds.bitmap(Not(Eq('species', 'virginica')))) == [0, 4, 5]
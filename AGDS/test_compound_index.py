@@ -0,0 +1,155 @@
+import random
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Not, Range
+
+
+def build(df, indexes=(), **kwargs):
+    agds = AGDS()
+    agds.build_from_pandas(df, **kwargs)
+    for attributes in indexes:
+        agds.create_index(*attributes)
+    return agds
+
+
+@pytest.fixture()
+def df():
+    rnd = random.Random(5)
+    return pd.DataFrame({
+        'country': [rnd.choice(['pl', 'de', 'fr']) for _ in range(200)],
+        'city': [rnd.choice(['a', 'b', 'c', 'd']) for _ in range(200)],
+        'age': [rnd.randint(18, 80) for _ in range(200)],
+    })
+
+
+@pytest.mark.parametrize(
+    'predicates',
+    [
+        [Eq('country', 'pl'), Eq('city', 'b')],
+        [Eq('country', 'pl'), Eq('city', 'b'), Eq('age', 30)],
+        [Eq('country', 'de'), Eq('city', 'a'), Range('age', 20, 40)],
+        [Eq('country', 'de'), Eq('city', 'a'), Range('age', 20, 40, include_low=False, include_high=False)],
+        [Eq('country', 'fr'), Eq('city', 'c'), Range('age', low=60)],
+        [Eq('country', 'fr'), Eq('city', 'c'), Range('age', high=25)],
+        [Eq('city', 'd'), Eq('country', 'pl'), ~Range('age', 30, 50)],
+        [Eq('country', 'xx'), Eq('city', 'a')],
+        [Eq('country', 'pl'), Range('age', 20, 30)],
+    ]
+)
+def test_indexed_query_should_match_unindexed_query(df, predicates):
+    plain = build(df)
+    indexed = build(df, [('country', 'city', 'age')])
+
+    assert set(indexed.query(*predicates)) == set(plain.query(*predicates))
+
+
+def test_query_should_use_longest_covering_index(df):
+    agds = build(df, [('country', 'city'), ('country', 'city', 'age')])
+
+    _, covered, elements = agds._index_plan([Eq('country', 'pl'), Eq('city', 'b'), Range('age', 20, 40)])
+
+    assert len(covered) == 3
+    assert all(el.key[:2] == ('pl', 'b') and 20 <= el.key[2] <= 40 for el in elements)
+    assert agds._index_plan([Eq('country', 'pl'), Eq('age', 30)]) is None
+
+
+def test_index_should_follow_row_mutations(df):
+    agds = build(df, [('country', 'city')])
+    predicates = [Eq('country', 'pl'), Eq('city', 'z')]
+
+    added = agds.add_row({'country': 'pl', 'city': 'z', 'age': 40})
+    assert set(agds.query(*predicates)) == {added}
+
+    agds.update_row('O0', {'country': 'pl', 'city': 'z'})
+    assert set(agds.query(*predicates)) == {added, 'O0'}
+
+    agds.update_row(added, {'age': 41})
+    agds.delete_row('O0')
+    assert set(agds.query(*predicates)) == {added}
+
+    agds.update_row(added, {'city': 'y'})
+    assert set(agds.query(*predicates)) == set()
+    assert agds.indexes[('country', 'city')].search(('pl', 'z')) == (False, None)
+
+
+def test_index_should_follow_builds_after_create_index():
+    agds = AGDS()
+    agds.build_from_triples([(0, 'a', 'x'), (0, 'b', 1)])
+    agds.create_index('a', 'b')
+
+    agds.build_from_triples([(10, 'a', 'x'), (10, 'b', 1), (0, 'b', 2)])
+    assert set(agds.query(Eq('a', 'x'), Eq('b', 1))) == {'O10'}
+    assert set(agds.query(Eq('a', 'x'), Eq('b', 2))) == {'O0'}
+
+    agds.delete_row('O0')
+    assert [(el.key, el.count) for el in agds.indexes[('a', 'b')]] == [(('x', 1), 1)]
+
+
+def test_index_created_before_build_from_pandas_should_cover_built_rows():
+    agds = AGDS()
+    agds.create_index('a', 'b')
+    agds.build_from_pandas(pd.DataFrame({'a': ['x', 'y', 'x'], 'b': [1, 1, 1]}))
+
+    assert agds._index_plan([Eq('a', 'x'), Eq('b', 1)]) is not None
+    assert set(agds.query(Eq('a', 'x'), Eq('b', 1))) == {'O0', 'O2'}
+
+
+def test_rebuilt_attributes_should_be_reindexed():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'x': [1, 2], 'y': [5, 6]}))
+    agds.create_index('x', 'y')
+    agds.build_from_pandas(pd.DataFrame({'x': [3, 4], 'y': [7, 8]}))
+
+    assert [el.key for el in agds.indexes[('x', 'y')]] == [(3, 7), (4, 8)]
+    assert list(agds.query(Eq('x', 3), Eq('y', 7))) == ['O0']
+    assert list(agds.query(Eq('x', 1))) == []
+    assert agds.rows['O1'].x.key == 4
+
+
+def test_index_plan_should_skip_null_values():
+    agds = build(pd.DataFrame({'a': [1.0, None], 'b': [1, 1]}), [('a', 'b')])
+
+    assert agds._index_plan([Eq('a', None), Eq('b', 1)]) is None
+    assert list(agds.query(Eq('a', None), Eq('b', 1))) == []
+    assert list(agds.query(Eq('a', float('nan')), Eq('b', 1))) == []
+
+
+def test_index_should_skip_rows_with_missing_values():
+    agds = build(pd.DataFrame({'a': ['x', None, 'x'], 'b': [1, 2, None]}), [('a', 'b')])
+
+    assert len(agds.indexes[('a', 'b')]) == 1
+    assert set(agds.query(Eq('a', 'x'), Eq('b', 1))) == {'O0'}
+
+
+def test_index_should_count_collapsed_duplicates():
+    agds = build(pd.DataFrame({'a': ['x', 'x', 'y'], 'b': [1, 1, 2]}), [('a', 'b')], deduplicate=True)
+
+    element, _ = agds.indexes[('a', 'b')].search(('x', 1))
+
+    assert element.count == 2
+    assert set(agds.query(Eq('a', 'x'), Eq('b', 1))) == {'O0'}
+
+
+def test_index_should_materialize_lazy_attributes(df):
+    agds = build(df, [('country', 'city')], lazy=True)
+
+    assert set(agds.query(Eq('country', 'pl'), Eq('city', 'b'))) == set(build(df).query(Eq('country', 'pl'), Eq('city', 'b')))
+
+
+def test_drop_index_should_fall_back_to_per_attribute_plans(df):
+    agds = build(df, [('country', 'city')])
+    agds.drop_index('country', 'city')
+
+    assert agds.indexes == {}
+    assert agds._index_plan([Eq('country', 'pl'), Eq('city', 'b')]) is None
+    assert not list(agds.query(Not(Eq('country', 'pl')), Eq('country', 'pl')))
+
+
+def test_range_on_nominal_attribute_should_still_raise_with_index(df):
+    agds = build(df, [('country', 'city')])
+
+    with pytest.raises(TypeError):
+        list(agds.query(Eq('country', 'pl'), Range('city', 'b', 'c')))
@@ -0,0 +1,56 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from AGDS.concurrency import ConcurrentAGDS
+from AGDS.query import Eq, Range
+from AGDS.result_cache import QueryCache
+
+
+def test_queries_should_see_whole_writes_while_rows_are_ingested():
+    agds = ConcurrentAGDS(query_cache=QueryCache())
+    agds.build_from_pandas(pd.DataFrame({'size': list(range(100)), 'kind': ['a', 'b'] * 50}), lazy=True)
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                rows = list(agds.query(Range('size', 10, 60), Eq('kind', 'a')))
+                # a pair of rows is always written in one batch
+                assert len(rows) % 2 == 0
+                agds.stats('size')
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+
+    for value in range(200):
+        agds.write_batch([('add_row', {'size': 20, 'kind': 'a'}), ('add_row', {'size': 30, 'kind': 'a'})])
+        if value % 10 == 0:
+            agds.delete_row(f'O{value // 5 + 1}')
+            agds.add_row({'size': 1, 'kind': 'b'})
+
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert len(list(agds.query(Range('size', 10, 60), Eq('kind', 'a')))) == 26 + 400
+    metrics = agds.lock.metrics()
+    assert metrics['batches'] == 200 and metrics['batched_operations'] == 400
+
+
+def test_write_batch_should_return_results_and_reject_reads():
+    agds = ConcurrentAGDS()
+
+    assert agds.write_batch([('add_row', {'x': 1}), ('add_row', {'x': 2}), ('update_row', 'O0', {'x': 3})]) == [
+        'O0', 'O1', None,
+    ]
+    assert set(agds.query(Eq('x', 3))) == {'O0'}
+
+    with pytest.raises(ValueError):
+        agds.write_batch([('query', Eq('x', 3))])
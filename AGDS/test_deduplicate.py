@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Range
+
+FRAME = pd.DataFrame({
+    'length': [1.0, 2.0, 1.0, 5.0, 1.0, 2.0, 5.2, 9.0, 9.0],
+    'species': ['a', 'b', 'a', 'c', 'a', 'b', 'c', 'd', 'd'],
+})
+
+
+@pytest.fixture()
+def deduplicated():
+    agds = AGDS()
+    agds.build_from_pandas(FRAME, deduplicate=True)
+    return agds
+
+
+@pytest.fixture()
+def plain():
+    agds = AGDS()
+    agds.build_from_pandas(FRAME)
+    return agds
+
+
+def test_deduplicate_should_collapse_identical_records(deduplicated):
+    assert sorted(deduplicated.rows) == ['O0', 'O1', 'O3', 'O6', 'O7']
+    assert deduplicated.multiplicity('O0') == 3
+    assert deduplicated.original_indices('O0') == [0, 2, 4]
+    assert deduplicated.original_indices('O7') == [7, 8]
+    assert deduplicated.multiplicity('O3') == 1
+    assert deduplicated.original_indices('O3') == [3]
+
+
+def test_deduplicate_should_keep_value_counts_and_stats(deduplicated, plain):
+    assert deduplicated.describe() == plain.describe()
+
+
+def test_query_on_deduplicated_graph_should_expand_to_original_rows(deduplicated, plain):
+    predicates = [Range('length', 0, 3), Eq('species', 'a')]
+    expanded = {index for row_id in deduplicated.query(*predicates) for index in deduplicated.original_indices(row_id)}
+
+    assert expanded == {int(row_id[1:]) for row_id in plain.query(*predicates)}
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 4, 5])
+def test_predict_should_weight_rows_by_multiplicity(deduplicated, plain, k):
+    queries = pd.DataFrame({'length': [1.4, 1.9, 4.0, 5.1, 8.0]})
+
+    assert deduplicated.predict(queries, 'species', k=k) == plain.predict(queries, 'species', k=k)
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 4, 6])
+def test_similar_should_weight_rows_by_multiplicity(deduplicated, plain, k):
+    # identical records score the same, so the scores of the k places decide
+    for query in ({'length': 1.9, 'species': 'b'}, {'length': 8.0}, {'length': 1.0, 'species': 'a'}):
+        result = deduplicated.similar(query, k=k)
+        places = [score for row_id, score in result for _ in range(deduplicated.multiplicity(row_id))]
+
+        assert places[:k] == pytest.approx([score for _, score in plain.similar(query, k=k)])
+        # no row beyond the one filling the k-th place
+        assert len(places) - deduplicated.multiplicity(result[-1][0]) < k
+
+
+def test_delete_collapsed_row_should_remove_every_record(deduplicated):
+    deduplicated.delete_row('O0')
+
+    assert deduplicated.stats('length')['count'] == 6
+    assert deduplicated.attributes['species'].search('a') == (False, None)
+
+
+def test_update_collapsed_row_should_move_every_record(deduplicated):
+    deduplicated.update_row('O1', {'species': 'c'})
+
+    assert deduplicated.attributes['species'].search('b') == (False, None)
+    assert deduplicated.attributes['species'].search('c')[0].count == 4
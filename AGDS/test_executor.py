@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Not, Range
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        f'attr_{i}': [(row * (i + 3)) % 11 for row in range(40)] for i in range(12)
+    }).assign(label=['a', 'b', 'c', 'd'] * 10))
+    return graph
+
+
+@pytest.fixture()
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def test_similar_with_executor_should_match_sequential(agds, executor):
+    query = {f'attr_{i}': i % 11 for i in range(12)}
+
+    assert agds.similar(query, k=6, executor=executor) == agds.similar(query, k=6)
+
+
+def test_predict_with_executor_should_match_sequential(agds, executor):
+    queries = pd.DataFrame({f'attr_{i}': [1, 5, 7] for i in range(12)})
+
+    assert agds.predict(queries, 'label', k=3, executor=executor) == agds.predict(queries, 'label', k=3)
+
+
+def test_bitmap_with_executor_should_match_sequential(agds, executor):
+    predicates = [Range('attr_0', 2, 8), Not(Eq('label', 'a')), Range('attr_3', high=6)]
+
+    assert agds.bitmap(*predicates, executor=executor) == agds.bitmap(*predicates)
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Not, Range
+
+FRAME = pd.DataFrame({
+    'length': [5.1, 4.9, 6.3, 5.8, 4.9],
+    'width': [3.5, 3.0, 3.3, 2.7, 3.0],
+    'height': [1, 2, 3, 4, 2],
+    'species': ['setosa', 'setosa', 'virginica', 'virginica', 'setosa'],
+})
+
+
+def eager_graph():
+    agds = AGDS()
+    agds.build_from_pandas(FRAME)
+    return agds
+
+
+def lazy_graph(**kwargs):
+    agds = AGDS(**kwargs)
+    agds.build_from_pandas(FRAME, lazy=True)
+    return agds
+
+
+def test_lazy_build_should_only_create_rows():
+    agds = lazy_graph()
+
+    assert len(agds.rows) == 5
+    assert list(agds.attributes) == ['length', 'width', 'height', 'species']
+    assert agds.attributes.materialized() == []
+    assert not hasattr(agds.rows['O0'], 'length')
+
+
+def test_lazy_build_should_keep_numeric_columns_as_arrays():
+    agds = lazy_graph()
+
+    assert isinstance(agds.attributes._sources['length'][0], np.ndarray)
+    assert isinstance(agds.attributes._sources['species'][0], list)
+    assert [type(el.key) for el in agds.attributes['length']] == [float] * 4
+    agds.attributes['height']
+    assert type(agds.rows['O0'].height.key) is int
+
+
+def test_first_access_should_build_attribute_and_row_links():
+    agds = lazy_graph()
+
+    length = agds.attributes['length']
+
+    assert agds.attributes.materialized() == ['length']
+    assert [(el.key, el.count) for el in length] == [(4.9, 2), (5.1, 1), (5.8, 1), (6.3, 1)]
+    assert agds.rows['O1'].length.key == 4.9
+    assert getattr(agds.rows['O1'].length, 'O1') is agds.rows['O1']
+
+
+def test_lazy_graph_should_answer_like_eager_graph():
+    lazy, eager = lazy_graph(), eager_graph()
+    predicates = [Range('length', 4, 6), Not(Eq('species', 'virginica'))]
+
+    assert set(lazy.query(*predicates)) == set(eager.query(*predicates))
+    assert lazy.similar({'width': 3.1, 'height': 2}, k=3) == eager.similar({'width': 3.1, 'height': 2}, k=3)
+    assert lazy.describe() == eager.describe()
+
+
+def test_mutations_before_materialization_should_be_applied():
+    lazy, eager = lazy_graph(), eager_graph()
+    for agds in (lazy, eager):
+        agds.delete_row('O0')
+        agds.update_row('O1', {'width': 9.0})
+        agds.add_row({'length': 7.0, 'width': 1.0, 'height': 5, 'species': 'versicolor'})
+
+    assert lazy.describe() == eager.describe()
+    assert lazy.rows['O1'].width.key == 9.0
+
+
+def test_budget_should_keep_most_recently_used_attributes():
+    agds = lazy_graph(max_materialized=2)
+
+    agds.attributes['length']
+    agds.attributes['width']
+    agds.attributes['length']
+    agds.attributes['height']
+
+    assert agds.attributes.materialized() == ['length', 'height']
+    assert not hasattr(agds.rows['O0'], 'width')
+
+
+def test_evicted_attribute_should_keep_mutations_after_rebuild():
+    agds = lazy_graph(max_materialized=1)
+
+    agds.update_row('O2', {'width': 10.0})
+    agds.add_row({'width': 0.5})
+    agds.attributes['length']
+    assert not agds.attributes.is_materialized('width')
+
+    width = agds.attributes['width']
+
+    assert [el.key for el in width] == [0.5, 2.7, 3.0, 3.5, 10.0]
+    assert agds.rows['O2'].width.key == 10.0
+    assert agds.rows['O5'].width.key == 0.5
+
+
+@pytest.mark.parametrize('predicates', [
+    (Range('length', 4.0, 6.0), Eq('species', 'setosa')),
+    (Eq('height', 2), Range('width', 2.0, 3.2), Not(Eq('species', 'virginica'))),
+])
+def test_query_should_pin_attributes_over_budget(predicates):
+    agds = lazy_graph(max_materialized=1)
+    agds.create_index('species', 'length')
+
+    assert sorted(agds.query(*predicates)) == sorted(eager_graph().query(*predicates))
+    assert len(agds.attributes.materialized()) == 1
+
+
+def test_evicted_attribute_should_drop_activation_arrays():
+    agds = lazy_graph(max_materialized=1)
+
+    agds.similar({'length': 5.0}, k=2)
+    assert set(agds._sorted_rows_cache) == {'length'}
+
+    agds.similar({'width': 3.0}, k=2)
+    assert set(agds._sorted_rows_cache) == {'width'}
+
+
+def test_unknown_attribute_should_raise():
+    with pytest.raises(KeyError):
+        lazy_graph().attributes['missing']
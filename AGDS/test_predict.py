@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import AGDS.AGDS_mixed_implementation as agds_module
+from AGDS.AGDS_mixed_implementation import AGDS
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        'length': [1.0, 1.2, 1.1, 5.0, 5.2, 5.1, 9.0],
+        'width': [0.1, 0.2, 0.1, 2.0, 2.1, 2.2, 3.0],
+        'species': ['a', 'a', 'a', 'b', 'b', 'b', 'c'],
+        'weight': [10.0, 12.0, 11.0, 50.0, 52.0, 51.0, 90.0],
+    }))
+    return graph
+
+
+@pytest.fixture()
+def queries():
+    return pd.DataFrame({
+        'length': [1.05, 5.1, 1.05, 5.05],
+        'width': [0.15, 2.1, 0.15, None],
+    })
+
+
+def test_predict_should_vote_for_nominal_target(agds, queries):
+    assert agds.predict(queries, 'species', k=3) == ['a', 'b', 'a', 'b']
+
+
+def test_predict_should_average_ordered_target(agds, queries):
+    predictions = agds.predict(queries[['length']], 'weight', k=3, cutoff=0.9)
+
+    assert predictions[0] == pytest.approx(11.0, abs=0.5)
+    assert predictions[1] == pytest.approx(51.0, abs=0.5)
+
+
+def test_predict_should_match_single_query_similarity(agds, queries):
+    queries = queries.dropna()
+    predictions = agds.predict(queries, 'species', k=2)
+
+    for (_, query), prediction in zip(queries.iterrows(), predictions):
+        best = agds.similar(query.to_dict(), k=2)
+        species = {agds.rows[row_id].species.key for row_id, _ in best}
+        assert species == {prediction}
+
+
+def test_predict_should_ignore_target_column_in_queries(agds):
+    queries = pd.DataFrame({'length': [9.0], 'species': ['a']})
+
+    assert agds.predict(queries, 'species', k=1) == ['c']
+
+
+def test_predict_should_return_none_when_nothing_is_activated(agds):
+    queries = pd.DataFrame({'length': [100.0]})
+
+    assert agds.predict(queries, 'species', k=3) == [None]
+
+
+def test_predict_should_give_same_result_for_small_chunks(agds, queries, monkeypatch):
+    expected = agds.predict(queries, 'species', k=3)
+    monkeypatch.setattr(agds_module, 'PREDICT_SCORE_CELLS', 1)
+
+    assert agds.predict(queries, 'species', k=3) == expected
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, In, Not, Range
+
+
+@pytest.fixture()
+def iris_like():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({
+        'sepal_length': [5.1, 4.9, 6.3, 5.8, 5.0, 6.0, 5.5],
+        'petal_width': [0.2, 1.4, 2.5, 1.9, 0.2, 1.6, 1.3],
+        'species': ['setosa', 'setosa', 'virginica', 'virginica', 'setosa', 'versicolor', 'versicolor'],
+    }))
+    return agds
+
+
+@pytest.mark.parametrize(
+    'predicates, expected',
+    [
+        ([Eq('species', 'setosa')], {'O0', 'O1', 'O4'}),
+        ([Range('sepal_length', 5, 6)], {'O0', 'O3', 'O4', 'O5', 'O6'}),
+        ([Range('sepal_length', 5, 6, include_low=False, include_high=False)], {'O0', 'O3', 'O6'}),
+        ([Range('petal_width', low=1, include_low=False)], {'O1', 'O2', 'O3', 'O5', 'O6'}),
+        ([In('species', ['versicolor', 'virginica', 'unknown'])], {'O2', 'O3', 'O5', 'O6'}),
+        ([Not(Eq('species', 'setosa'))], {'O2', 'O3', 'O5', 'O6'}),
+        ([Range('sepal_length', 5, 6), Eq('species', 'setosa'), Range('petal_width', low=1)], set()),
+        ([Range('sepal_length', 5, 6), Eq('species', 'versicolor'), Range('petal_width', low=1)], {'O5', 'O6'}),
+        ([Range('sepal_length', 5, 6), ~Eq('species', 'versicolor')], {'O0', 'O3', 'O4'}),
+        ([Eq('species', 'setosa'), Not(Range('petal_width', high=1))], {'O1'}),
+        ([Eq('species', 'missing')], set()),
+        ([], {'O0', 'O1', 'O2', 'O3', 'O4', 'O5', 'O6'}),
+    ]
+)
+def test_query_should_return_rows_matching_all_predicates(iris_like, predicates, expected):
+    assert set(iris_like.query(*predicates)) == expected
+
+
+def test_query_should_be_lazy(iris_like):
+    result = iris_like.query(Range('sepal_length', 5, 6))
+
+    assert next(result) in {'O0', 'O3', 'O4', 'O5', 'O6'}
+
+
+def test_query_should_follow_row_mutations(iris_like):
+    iris_like.delete_row('O0')
+    row_id = iris_like.add_row({'sepal_length': 5.2, 'petal_width': 0.3, 'species': 'setosa'})
+
+    assert set(iris_like.query(Eq('species', 'setosa'), Range('sepal_length', high=5.5))) == {'O1', 'O4', row_id}
+
+
+def test_range_on_nominal_attribute_should_raise(iris_like):
+    with pytest.raises(TypeError):
+        list(iris_like.query(Range('species', 'a', 'z')))
+
+
+def test_invert_should_toggle_negation():
+    predicate = Eq('species', 'setosa')
+
+    assert isinstance(~predicate, Not)
+    assert ~~predicate is predicate
+
+
+@pytest.mark.parametrize(
+    'predicates, expected',
+    [
+        ([Eq('a', 2.0), Range('b', 0, 5)], {'O1'}),
+        ([Eq('a', 2.0), Not(Range('b', 0, 5))], {'O2'}),
+        ([Eq('a', 2.0), Eq('b', float('nan'))], set()),
+        ([Eq('b', float('nan'))], set()),
+        ([In('b', [None, 3.0]), Eq('a', 2.0)], {'O1'}),
+        ([Not(Eq('b', float('nan')))], {'O0', 'O1', 'O2', 'O3'}),
+    ]
+)
+def test_null_values_should_match_only_negations(predicates, expected):
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'a': [1.0, 2.0, 2.0, 3.0], 'b': [1.0, 3.0, None, None]}))
+
+    assert set(agds.query(*predicates)) == expected
+    assert {f'O{index}' for index in agds.bitmap(*predicates)} == expected
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.bitmap import RowBitmap
+from AGDS.query import Eq, Not, Range
+from AGDS.result_cache import QueryCache, estimate_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_should_count_hits_and_misses():
+    cache = QueryCache()
+
+    assert cache.get('q', (1,)) == (False, None)
+    cache.put('q', (1,), [1, 2])
+
+    assert cache.get('q', (1,)) == (True, [1, 2])
+    assert cache.metrics()['hits'] == 1
+    assert cache.metrics()['misses'] == 1
+
+
+def test_cache_should_invalidate_entry_with_changed_versions():
+    cache = QueryCache()
+    cache.put('q', (1,), 'result')
+
+    assert cache.get('q', (2,)) == (False, None)
+    assert 'q' not in cache
+    assert cache.invalidations == 1
+
+
+def test_cache_should_evict_least_recently_used_entry():
+    cache = QueryCache(max_entries=2)
+    cache.put('a', (), 1)
+    cache.put('b', (), 2)
+    cache.get('a', ())
+    cache.put('c', (), 3)
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.evictions == 1
+
+
+def test_cache_should_respect_byte_budget():
+    big = list(range(100))
+    cache = QueryCache(max_bytes=estimate_size(big) + 10)
+
+    cache.put('a', (), big)
+    cache.put('b', (), list(range(50)))
+
+    assert 'a' not in cache and 'b' in cache
+    assert cache.bytes <= cache.max_bytes
+
+    cache.put('huge', (), list(range(1000)))
+    assert 'huge' not in cache
+
+
+def test_cache_should_expire_entries_after_ttl():
+    clock = FakeClock()
+    cache = QueryCache(ttl=5, clock=clock)
+    cache.put('a', (), 1)
+
+    clock.now = 4
+    assert cache.get('a', ()) == (True, 1)
+
+    clock.now = 6
+    assert cache.get('a', ()) == (False, None)
+
+
+def test_estimate_size_should_include_bitmap_buffer():
+    bitmap = RowBitmap.from_indices([1], 8000)
+
+    assert estimate_size(bitmap) >= 1000
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS(query_cache=QueryCache())
+    graph.build_from_pandas(pd.DataFrame({
+        'length': [5.1, 4.9, 6.3, 5.8],
+        'width': [1.0, 2.0, 3.0, 4.0],
+        'species': ['setosa', 'setosa', 'virginica', 'virginica'],
+    }))
+    return graph
+
+
+def test_agds_should_serve_repeated_queries_from_cache(agds):
+    first = set(agds.query(Eq('species', 'setosa'), Range('length', 5, 6)))
+    second = set(agds.query(Range('length', 5, 6), Eq('species', 'setosa')))
+
+    assert first == second == {'O0'}
+    assert agds.query_cache.hits == 1
+
+
+def test_agds_cache_should_be_invalidated_by_mutation_of_touched_attribute(agds):
+    agds.similar({'length': 5.0}, k=1)
+    agds.add_row({'length': 5.0})
+
+    assert agds.similar({'length': 5.0}, k=1)[0][0] == 'O4'
+    assert agds.query_cache.invalidations == 1
+
+
+def test_agds_cache_should_survive_mutation_of_other_attributes(agds):
+    agds.bitmap(Eq('species', 'setosa'))
+    agds.update_row('O3', {'width': 10.0})
+
+    assert list(agds.bitmap(Eq('species', 'setosa'))) == [0, 1]
+    assert agds.query_cache.hits == 1
+
+
+def test_agds_negated_query_should_follow_new_rows_without_attribute(agds):
+    assert set(agds.query(Not(Eq('species', 'setosa')))) == {'O2', 'O3'}
+
+    row_id = agds.add_row({'length': 1.0})
+
+    assert set(agds.query(Not(Eq('species', 'setosa')))) == {'O2', 'O3', row_id}
+
+
+
+def test_agds_cache_should_be_invalidated_by_replaced_attribute(agds):
+    assert set(agds.query(Eq('species', 'setosa'))) == {'O0', 'O1'}
+
+    agds.attributes['species'] = agds.attributes['species'].__class__()
+
+    assert list(agds.query(Eq('species', 'setosa'))) == []
@@ -0,0 +1,103 @@
+import asyncio
+import random
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.concurrency import ConcurrentAGDS
+from AGDS.query import Eq, Range
+from AGDS.service import AGDSService
+from performance_testing.t_service import request_mix, run_load
+
+
+@pytest.fixture()
+def agds():
+    rnd = random.Random(1)
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        'value': [rnd.randrange(100) for _ in range(2000)],
+        'bucket': [f'b{rnd.randrange(10)}' for _ in range(2000)],
+    }))
+    return graph
+
+
+def test_service_should_answer_like_the_graph(agds):
+    predicates = (Range('value', 10, 30), Eq('bucket', 'b3'))
+
+    async def main():
+        async with AGDSService(agds) as service:
+            return await asyncio.gather(
+                service.query(*predicates), service.similar({'value': 40}, k=3), service.stats('bucket'),
+            )
+
+    rows, similar, stats = asyncio.run(main())
+
+    assert rows == sorted(agds.query(*predicates), key=lambda row_id: int(row_id[1:]))
+    assert similar == agds.similar({'value': 40}, k=3)
+    assert stats == agds.stats('bucket')
+
+
+def test_concurrent_identical_requests_should_be_coalesced(agds):
+    async def main():
+        async with AGDSService(agds) as service:
+            results = await asyncio.gather(*[service.query(Eq('bucket', 'b1')) for _ in range(10)])
+            return results, service.metrics()
+
+    results, metrics = asyncio.run(main())
+
+    assert all(result == results[0] for result in results)
+    assert metrics['requests'] == 10
+    assert metrics['computed'] + metrics['coalesced'] == 10
+    assert metrics['coalesced'] > 0
+
+
+def test_bounded_queue_should_suspend_submitters(agds):
+    async def main():
+        async with AGDSService(agds, max_pending=2, max_batch=2) as service:
+            tasks = [asyncio.create_task(service.stats('value')) for _ in range(6)]
+            await asyncio.sleep(0)
+            pending = service.metrics()['pending']
+            await asyncio.gather(*tasks)
+            return pending, service.metrics()
+
+    pending, metrics = asyncio.run(main())
+
+    assert pending <= 2
+    assert metrics['batches'] >= 3
+
+
+def test_failed_request_should_raise_only_for_its_callers(agds):
+    async def main():
+        async with AGDSService(agds) as service:
+            return await asyncio.gather(service.stats('missing'), service.stats('value'), return_exceptions=True)
+
+    missing, value = asyncio.run(main())
+
+    assert isinstance(missing, KeyError)
+    assert value == agds.stats('value')
+
+
+def test_service_should_require_start(agds):
+    with pytest.raises(RuntimeError):
+        asyncio.run(AGDSService(agds).stats('value'))
+
+
+def test_service_should_measure_latency_under_load_while_graph_is_written():
+    graph = ConcurrentAGDS()
+    graph.build_from_pandas(pd.DataFrame({'value': list(range(1000)), 'bucket': [f'b{i % 10}' for i in range(1000)]}))
+
+    async def main():
+        async with AGDSService(graph) as service:
+            writes = asyncio.get_running_loop().run_in_executor(
+                None, lambda: [graph.add_row({'value': i, 'bucket': 'b0'}) for i in range(200)]
+            )
+            result = await run_load(service, request_mix(service), requests=300, concurrency=16)
+            await writes
+            return result
+
+    result = asyncio.run(main())
+
+    assert result['requests'] == 300
+    assert result['p50'] <= result['p90'] <= result['p99']
+    assert result['batches'] < 300
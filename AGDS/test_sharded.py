@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS, row_index
+from AGDS.query import Eq, In, Not, Range
+from AGDS.sharded import ShardedAGDS
+
+
+@pytest.fixture()
+def df():
+    rng = np.random.default_rng(7)
+    lengths = rng.integers(0, 20, 60).astype(float)
+    lengths[[3, 17, 40]] = np.nan
+    return pd.DataFrame({
+        'length': lengths,
+        'width': rng.normal(size=60),
+        'color': rng.choice(['red', 'blue', 'green', None], 60),
+    })
+
+
+@pytest.fixture()
+def pair(df):
+    single = AGDS()
+    single.build_from_pandas(df)
+    with ShardedAGDS(shards=3) as sharded:
+        sharded.build_from_pandas(df)
+        yield single, sharded
+
+
+def test_rows_should_be_partitioned_over_shards(pair, df):
+    _, sharded = pair
+
+    assert len(sharded) == len(df)
+    assert sharded._broadcast('rows') == [20, 20, 20]
+
+
+@pytest.mark.parametrize('predicates', [
+    (Eq('color', 'red'),),
+    (Range('length', 5, 12), Not(Eq('color', 'blue'))),
+    (In('color', ['green', 'blue']), Range('width', high=0.0)),
+    (Eq('length', 100.0),),
+])
+def test_query_should_match_single_agds(pair, predicates):
+    single, sharded = pair
+
+    assert sharded.query(*predicates) == sorted(single.query(*predicates), key=row_index)
+
+
+@pytest.mark.parametrize('col', ['length', 'width', 'color'])
+def test_stats_should_be_merged_exactly(pair, col):
+    single, sharded = pair
+
+    merged, expected = sharded.stats(col), single.stats(col)
+    if col == 'color':
+        # most frequent value may differ on ties
+        assert merged['freq'] == expected['freq']
+        merged.pop('top'), expected.pop('top')
+    assert merged == expected
+
+
+def test_quantile_should_match_numpy(pair, df):
+    _, sharded = pair
+    lengths = df['length'].dropna()
+
+    for q in (0.0, 0.1, 0.5, 0.75, 1.0):
+        assert sharded.quantile('length', q) == pytest.approx(np.quantile(lengths, q))
+
+    with pytest.raises(TypeError):
+        sharded.quantile('color', 0.5)
+
+
+def test_mutations_should_be_routed_to_owning_shard(pair):
+    single, sharded = pair
+
+    for agds in pair:
+        assert agds.add_row({'length': 50.0, 'color': 'red'}) == 'O60'
+        agds.update_row('O4', {'length': 51.0})
+        agds.delete_row('O5')
+
+    assert sharded.query(Range('length', 50.0)) == ['O4', 'O60']
+    assert sharded.stats('length') == single.stats('length')
+    assert len(sharded) == len(single.rows)
+
+
+def test_later_builds_should_append_rows(df):
+    single = AGDS()
+    single.build_from_pandas(df)
+
+    with ShardedAGDS(shards=3) as sharded:
+        sharded.build_from_pandas(df[:25])
+        sharded.build_from_pandas(df[25:].reset_index(drop=True))
+
+        assert len(sharded) == len(df)
+        for col in ('length', 'width'):
+            assert sharded.stats(col) == single.stats(col)
+        assert sharded.query(Range('length', 0)) == sorted(single.query(Range('length', 0)), key=row_index)
+        assert sharded.add_row({'length': 1.0}) == 'O60'
+
+        with pytest.raises(ValueError):
+            sharded.build_from_pandas(df, deduplicate=True)
+
+
+def test_worker_errors_should_be_raised_in_coordinator(pair):
+    _, sharded = pair
+
+    with pytest.raises(KeyError):
+        sharded.delete_row('O1000')
+    with pytest.raises(KeyError):
+        sharded.stats('missing')
+
+    # pipes stay usable after a failed request
+    assert len(sharded) == 60
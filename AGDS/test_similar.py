@@ -0,0 +1,76 @@
+import random
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        'length': [1.0, 2.0, 3.0, 5.0, 5.0],
+        'width': [10, 20, 30, 40, 50],
+        'species': ['a', 'a', 'b', 'b', 'c'],
+    }))
+    return graph
+
+
+def test_similar_should_weight_neighbours_by_distance(agds):
+    result = dict(agds.similar({'length': 2.0}, k=5))
+
+    assert result == pytest.approx({'O1': 1.0, 'O0': 0.75, 'O2': 0.75, 'O3': 0.25, 'O4': 0.25})
+
+
+def test_similar_should_return_best_rows_first(agds):
+    result = agds.similar({'length': 5.0, 'width': 50, 'species': 'c'}, k=2)
+
+    assert [row_id for row_id, _ in result] == ['O4', 'O3']
+    assert result[0][1] == pytest.approx(1.0)
+    assert result[1][1] == pytest.approx((1.0 + 0.75 + 0.0) / 3)
+
+
+def test_similar_should_respect_cutoff(agds):
+    result = dict(agds.similar({'length': 2.0}, k=5, cutoff=0.5))
+
+    assert result == pytest.approx({'O1': 1.0, 'O0': 0.75, 'O2': 0.75})
+
+
+def test_similar_should_handle_values_between_and_outside_keys(agds):
+    between = dict(agds.similar({'length': 4.0}, k=5))
+    above = dict(agds.similar({'length': 6.0}, k=5))
+
+    assert between == pytest.approx({'O3': 0.75, 'O4': 0.75, 'O2': 0.75, 'O1': 0.5, 'O0': 0.25})
+    assert above == pytest.approx({'O3': 0.75, 'O4': 0.75, 'O2': 0.25})
+
+
+def test_similar_should_only_activate_exact_nominal_value(agds):
+    assert sorted(agds.similar({'species': 'b'}, k=5)) == [('O2', 1.0), ('O3', 1.0)]
+    assert agds.similar({'species': 'z'}, k=5) == []
+
+
+def test_similar_should_ignore_deleted_rows(agds):
+    agds.delete_row('O1')
+
+    assert 'O1' not in dict(agds.similar({'length': 2.0}, k=5))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_similar_should_match_weights_of_every_value(seed):
+    rnd = random.Random(seed)
+    values = [rnd.choice([rnd.randrange(20), rnd.randrange(20) / 4]) for _ in range(60)]
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'value': values}))
+    agds.update_row('O0', {'value': 100})
+    agds.delete_row('O1')
+    values[0] = 100
+    value_range = 100 - min(value for row, value in enumerate(values) if row != 1)
+
+    for query in (rnd.randrange(-10, 110), rnd.random() * 30):
+        for cutoff in (0.0, 0.8, 0.99):
+            expected = {
+                f'O{row}': 1 - abs(value - query) / value_range for row, value in enumerate(values)
+                if row != 1 and 1 - abs(value - query) / value_range > cutoff
+            }
+            assert dict(agds.similar({'value': query}, k=len(values), cutoff=cutoff)) == expected
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Range
+from ASA.ASA_tree_and_d_queue import ASA
+from ASA.nominal_values import NominalValues
+
+
+def test_build_from_triples_should_only_link_present_values():
+    agds = AGDS()
+    agds.build_from_triples([(0, 'a', 1.0), (2, 'b', 'x'), (0, 'c', 5), (2, 'a', 3.0), (1, 'c', None)])
+
+    assert sorted(agds.rows) == ['O0', 'O2']
+    assert agds.add_row({'a': 2.0}) == 'O3'
+    assert vars(agds.rows['O0']).keys() == {'_hash_key', 'a', 'c'}
+    assert [(el.key, el.count) for el in agds.attributes['a']] == [(1.0, 1), (2.0, 1), (3.0, 1)]
+    assert isinstance(agds.attributes['b'], NominalValues)
+    assert agds.attributes['c'].nulls is None
+
+
+def test_build_from_triples_should_keep_last_value_of_repeated_cell():
+    agds = AGDS()
+    agds.build_from_triples([(0, 'a', 1), (0, 'a', 2)])
+
+    assert [(el.key, el.count) for el in agds.attributes['a']] == [(2, 1)]
+    assert agds.rows['O0'].a.key == 2
+
+
+def test_build_from_triples_should_replace_values_of_lazy_attributes():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'x': [1, 2]}), lazy=True)
+    agds.build_from_triples([(0, 'x', 10)])
+
+    assert [(el.key, el.count) for el in agds.attributes['x']] == [(2, 1), (10, 1)]
+    assert list(agds.query(Eq('x', 1))) == []
+    assert list(agds.query(Eq('x', 10))) == ['O0']
+
+
+def test_build_from_triples_should_accept_nominal_schema():
+    agds = AGDS()
+    agds.build_from_triples([(0, 'code', 3), (1, 'code', 3), (0, 'name', 'b')], nominal=['code'])
+
+    assert isinstance(agds.attributes['code'], NominalValues)
+    assert isinstance(agds.attributes['name'], ASA)
+
+
+def test_build_from_records_should_support_queries():
+    agds = AGDS()
+    agds.build_from_records([
+        {'length': 5.1, 'species': 'setosa'},
+        {'width': 3.0},
+        {'length': 6.3, 'species': 'virginica', 'width': 3.3},
+    ])
+
+    assert set(agds.query(Range('length', 5, 7))) == {'O0', 'O2'}
+    assert set(agds.query(Eq('species', 'virginica'), Range('width', 3, 4))) == {'O2'}
+    assert agds.stats('width')['count'] == 2
+
+
+@pytest.mark.parametrize('columns, expected', [(None, {'0', '3'}), (['a', 'b', 'c', 'd'], {'a', 'd'})])
+def test_build_from_sparse_should_read_coo_entries(columns, expected):
+    coo = SimpleNamespace(row=np.array([0, 2, 2]), col=np.array([0, 3, 0]), data=np.array([1.5, 0.0, 2.5]))
+    agds = AGDS()
+    agds.build_from_sparse(coo, columns=columns)
+
+    assert set(agds.attributes) == expected
+    first = 'a' if columns else '0'
+    assert [el.key for el in agds.attributes[first]] == [1.5, 2.5]
+    assert sorted(agds.rows) == ['O0', 'O2']
+
+
+def test_build_from_sparse_should_convert_scipy_matrices():
+    sparse = pytest.importorskip('scipy.sparse')
+    agds = AGDS()
+    agds.build_from_sparse(sparse.csr_matrix(np.array([[0, 1], [2, 0]])), columns=['x', 'y'])
+
+    assert agds.rows['O0'].y.key == 1
+    assert not hasattr(agds.rows['O0'], 'x')
@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS, container_bytes
+from AGDS.spill import SpillStore
+
+FRAME = pd.DataFrame({
+    'length': [5.1, 4.9, 6.3, 5.8, 4.9, 7.0],
+    'count': [1, 2, 3, 4, 2, 10 ** 30],
+    'species': ['setosa', 'setosa', 'virginica', 'virginica', 'setosa', 'versicolor'],
+    'mixed': [1, 'a', 2.5, None, True, 'a'],
+})
+
+
+@pytest.mark.parametrize('values', [[1.5, 2.5], [1, 2], ['a', 'b'], [1, 'a', None], [10 ** 30, 1], []])
+def test_spill_store_should_round_trip_sources(tmp_path, values):
+    store = SpillStore(str(tmp_path))
+    row_ids = [f'O{index}' for index in range(len(values))]
+
+    spilled = store.write((values, row_ids, True))
+    assert os.path.exists(spilled.values_path)
+
+    assert store.read(spilled) == (values, row_ids, True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_spill_store_should_memory_map_columnar_values(tmp_path):
+    spilled = SpillStore(str(tmp_path)).write(([1.0, 2.0], ['O0', 'O1'], False))
+
+    assert spilled.columnar
+
+
+def graph(tmp_path, **kwargs):
+    agds = AGDS(spill_dir=str(tmp_path), **kwargs)
+    agds.build_from_pandas(FRAME, lazy=True)
+    return agds
+
+
+def test_byte_budget_should_spill_least_recently_used_attributes(tmp_path):
+    agds = graph(tmp_path)
+    length_bytes = container_bytes(agds.attributes['length'])
+    count_bytes = container_bytes(agds.attributes['count'])
+    agds.attributes.max_bytes = length_bytes + count_bytes
+
+    assert agds.attributes.materialized() == ['length', 'count']
+
+    agds.attributes['species']
+
+    assert agds.attributes.materialized() == ['count', 'species']
+    assert agds.attributes.spilled() == ['length']
+    assert agds.attributes.evictions == {'length': 1}
+    assert len(os.listdir(tmp_path)) == 2
+    assert set(agds.attributes.resident_bytes()) == {'count', 'species'}
+    assert not hasattr(agds.rows['O0'], 'length')
+
+    agds.attributes['length']
+
+    assert agds.attributes.spilled() == ['count']
+    assert agds.rows['O0'].length.key == 5.1
+
+
+def test_spilled_attributes_should_reload_with_mutations(tmp_path):
+    agds = graph(tmp_path, max_materialized=1)
+    eager = AGDS()
+    eager.build_from_pandas(FRAME)
+
+    for g in (agds, eager):
+        g.update_row('O0', {'length': 1.0, 'species': 'virginica'})
+        g.delete_row('O2')
+        g.add_row({'length': 2.0, 'count': 5, 'species': 'setosa', 'mixed': 'b'})
+
+    assert agds.attributes.spilled()
+    assert agds.describe() == eager.describe()
+    assert agds.attributes['length'] is not None
+    assert agds.rows['O0'].length.key == 1.0
+    assert agds.attributes.evictions['length'] >= 2
+
+
+def test_resident_bytes_should_follow_mutations(tmp_path):
+    agds = graph(tmp_path)
+    agds.attributes['length']
+    before = agds.attributes.resident_bytes()['length']
+
+    for value in range(20):
+        agds.add_row({'length': 100.0 + value})
+
+    assert agds.attributes.resident_bytes()['length'] > before
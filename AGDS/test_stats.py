@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import AGDS
+
+
+@pytest.fixture()
+def agds():
+    graph = AGDS()
+    graph.build_from_pandas(pd.DataFrame({
+        'length': [1.0, 2.0, 2.0, 3.0, 7.0],
+        'species': ['a', 'b', 'b', 'c', 'b'],
+        'code': ['x', 'y', 'z', 'y', 'x'],
+    }), nominal=['species'])
+    return graph
+
+
+def test_stats_should_describe_numeric_attribute(agds):
+    assert agds.stats('length') == {
+        'count': 5, 'nulls': 0, 'distinct': 4, 'min': 1.0, 'max': 7.0, 'range': 6.0, 'mean': 3.0, 'median': 2.0,
+    }
+
+
+def test_stats_should_describe_nominal_attribute(agds):
+    assert agds.stats('species') == {'count': 5, 'nulls': 0, 'distinct': 3, 'top': 'b', 'freq': 3}
+
+
+def test_stats_should_describe_ordered_string_attribute(agds):
+    assert agds.stats('code') == {'count': 5, 'nulls': 0, 'distinct': 3, 'min': 'x', 'max': 'z'}
+
+
+def test_describe_should_cover_all_attributes(agds):
+    assert set(agds.describe()) == {'length', 'species', 'code'}
+
+
+def test_stats_should_be_served_from_cache_until_attribute_changes(agds, monkeypatch):
+    agds.stats('length')
+
+    calls = []
+    compute = AGDS._compute_stats
+    monkeypatch.setattr(AGDS, '_compute_stats', staticmethod(lambda container: calls.append(1) or compute(container)))
+
+    agds.stats('length')
+    assert calls == []
+
+    agds.add_row({'length': 12.0, 'species': 'a'})
+    assert agds.stats('length')['max'] == 12.0
+    assert agds.stats('length')['mean'] == 4.5
+    assert calls == [1]
+
+
+def test_stats_should_follow_deletes(agds):
+    agds.stats('species')
+    agds.delete_row('O1')
+    agds.delete_row('O2')
+
+    assert agds.stats('species') == {'count': 3, 'nulls': 0, 'distinct': 3, 'top': 'a', 'freq': 1}
+
+
+def test_stats_of_emptied_attribute(agds):
+    for row_id in list(agds.rows):
+        agds.delete_row(row_id)
+
+    assert agds.stats('length') == {'count': 0, 'nulls': 0, 'distinct': 0, 'min': None, 'max': None}
+
+
+def test_stats_should_count_nulls_separately():
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({'length': [1.0, None, 3.0, None], 'species': ['a', None, 'a', 'b']}))
+
+    assert agds.stats('length') == {
+        'count': 2, 'nulls': 2, 'distinct': 2, 'min': 1.0, 'max': 3.0, 'range': 2.0, 'mean': 2.0, 'median': 2.0,
+    }
+    assert agds.stats('species') == {'count': 3, 'nulls': 1, 'distinct': 2, 'top': 'a', 'freq': 2}
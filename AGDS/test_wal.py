@@ -0,0 +1,149 @@
+import os
+
+import pandas as pd
+import pytest
+
+from AGDS.AGDS_mixed_implementation import all_elements, linked_rows
+from AGDS.query import Eq
+from AGDS.wal import DurableAGDS, WriteAheadLog
+
+
+def image(agds):
+    attributes = {
+        col: [
+            (element.key, element.count, sorted(row_id for row_id, _ in linked_rows(element)))
+            for element in all_elements(agds.attributes[col])
+        ]
+        for col in agds.attributes
+    }
+    return attributes, sorted(agds.rows), agds._next_row, {row_id: agds.multiplicity(row_id) for row_id in agds.rows}
+
+
+@pytest.fixture()
+def df():
+    return pd.DataFrame({
+        'length': [3.0, 1.0, None, 3.0, 2.0, 3.0],
+        'color': ['red', 'blue', 'red', 'red', None, 'red'],
+    })
+
+
+def test_log_should_group_records_and_fsync_once_per_group(tmp_path):
+    log = WriteAheadLog(str(tmp_path / 'wal.log'), group_size=4, max_delay=float('inf'))
+
+    for i in range(10):
+        log.append('add', f'O{i}', {'x': i})
+    assert log.metrics()['groups'] == 2 and log.metrics()['pending'] == 2
+
+    assert log.commit() == 10
+    log.close()
+
+    assert log.metrics()['fsyncs'] == 3
+    records = list(WriteAheadLog.read(log.path, after_lsn=7))
+    assert records == [(8, 'add', 'O7', {'x': 7}), (9, 'add', 'O8', {'x': 8}), (10, 'add', 'O9', {'x': 9})]
+
+
+def test_read_should_stop_at_torn_tail(tmp_path):
+    path = str(tmp_path / 'wal.log')
+    log = WriteAheadLog(path, group_size=1)
+    log.append('delete', 'O1')
+    log.append('delete', 'O2')
+    log.close()
+
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) - 3)
+
+    assert [record[:3] for record in WriteAheadLog.read(path)] == [(1, 'delete', 'O1')]
+
+
+def test_recover_should_restore_checkpoint_and_replay_log_tail(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path), group_size=3)
+    agds.build_from_pandas(df, deduplicate=True)
+    agds.create_index('color', 'length')
+
+    agds.add_row({'length': 7.0, 'color': 'green'})
+    agds.update_row('O1', {'length': 5.0, 'color': 'red'})
+    agds.delete_row('O4')
+    agds.add_row({'length': 1.0})
+    agds.commit()
+
+    recovered = DurableAGDS.recover(str(tmp_path), group_size=2)
+
+    assert image(recovered) == image(agds)
+    assert set(recovered.query(Eq('color', 'red'), Eq('length', 5.0))) == {'O1'}
+    assert recovered.multiplicity('O0') == 3
+    assert recovered.attributes['length'].stats() == agds.attributes['length'].stats()
+
+    recovered.add_row({'length': 4.0, 'color': 'red'})
+    recovered.commit()
+    assert image(DurableAGDS.recover(str(tmp_path))) == image(recovered)
+
+
+def test_recover_should_cut_torn_tail_before_appending(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path), group_size=1)
+    agds.build_from_pandas(df)
+    agds.add_row({'length': 9.0})
+    agds.close()
+
+    segment, = agds._segments()
+    with open(segment, 'r+b') as file:
+        file.truncate(os.path.getsize(segment) - 3)
+
+    recovered = DurableAGDS.recover(str(tmp_path), group_size=1)
+    assert 'O6' not in recovered.rows
+    assert [recovered.add_row({'length': 1.0}), recovered.add_row({'length': 2.0})] == ['O6', 'O7']
+    recovered.commit()
+
+    assert image(DurableAGDS.recover(str(tmp_path))) == image(recovered)
+
+
+def test_index_changes_should_survive_recovery(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path))
+    agds.build_from_pandas(df)
+    agds.create_index('color', 'length')
+    agds.create_index('length', 'color')
+    agds.drop_index('color', 'length')
+    agds.commit()
+
+    recovered = DurableAGDS.recover(str(tmp_path))
+
+    assert list(recovered.indexes) == [('length', 'color')]
+    assert set(recovered.query(Eq('length', 3.0), Eq('color', 'red'))) == {'O0', 'O3', 'O5'}
+
+
+def test_constructor_over_existing_log_should_recover_instead_of_restarting(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path))
+    agds.build_from_pandas(df)
+    agds.add_row({'length': 9.0})
+    agds.close()
+
+    reopened = DurableAGDS(str(tmp_path))
+    assert image(reopened) == image(agds)
+    assert reopened.add_row({'length': 1.0}) == 'O7'
+    reopened.close()
+
+    assert image(DurableAGDS.recover(str(tmp_path))) == image(reopened)
+
+
+def test_uncommitted_mutations_should_be_lost_but_not_corrupt_recovery(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path), group_size=100, max_delay=float('inf'))
+    agds.build_from_pandas(df)
+    agds.add_row({'length': 9.0})
+    agds.commit()
+    committed = image(agds)
+    agds.add_row({'length': 10.0})
+
+    assert image(DurableAGDS.recover(str(tmp_path))) == committed
+
+
+def test_checkpoint_should_truncate_log(tmp_path, df):
+    agds = DurableAGDS(str(tmp_path), group_size=1, checkpoint_every=5)
+    agds.build_from_pandas(df)
+
+    for i in range(12):
+        agds.add_row({'length': float(i), 'color': 'blue'})
+    agds.commit()
+
+    files = sorted(os.listdir(tmp_path))
+    assert [name for name in files if name.startswith('checkpoint')] == [f'checkpoint-{10:020d}.pkl']
+    assert [name for name in files if name.startswith('wal')] == [f'wal-{11:020d}.log']
+    assert image(DurableAGDS.recover(str(tmp_path))) == image(agds)
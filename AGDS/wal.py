@@ -0,0 +1,394 @@
+import glob
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from AGDS.AGDS_mixed_implementation import AGDS, RowNode, linked_rows, row_index
+from ASA.nominal_values import NominalValues
+
+# payload length, crc32 of the payload, log sequence number
+RECORD_HEADER = struct.Struct('<IIQ')
+
+LOG_PATTERN = 'wal-{:020d}.log'
+CHECKPOINT_PATTERN = 'checkpoint-{:020d}.pkl'
+
+
+class WriteAheadLog:
+    """Append-only binary log of row mutations.
+
+    Every record is a header (payload length, crc32, log sequence number)
+    followed by a pickled (operation, row id, values) payload. Appended
+    records are buffered and written as one group once `group_size`
+    records are waiting or the oldest waited `max_delay` seconds, with a
+    single fsync per group when `sync` is set. commit() writes the pending
+    group right away.
+    """
+
+    def __init__(self, path, start_lsn=0, group_size=64, max_delay=0.01, sync=True, clock=time.monotonic):
+        self.path = path
+        self.lsn = start_lsn
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self.sync = sync
+        self.clock = clock
+
+        self._file = open(path, 'ab')
+        self._buffer = bytearray()
+        self._pending = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+
+        self.records = 0
+        self.groups = 0
+        self.fsyncs = 0
+        self.bytes = 0
+
+    def append(self, operation, row_id, values=None):
+        payload = pickle.dumps((operation, row_id, values), protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self.lsn += 1
+            self._buffer += RECORD_HEADER.pack(len(payload), zlib.crc32(payload), self.lsn)
+            self._buffer += payload
+            self._pending += 1
+            self.records += 1
+            if self._oldest is None:
+                self._oldest = self.clock()
+
+            if self._pending >= self.group_size or self.clock() - self._oldest >= self.max_delay:
+                self._write_group()
+
+            return self.lsn
+
+    def commit(self):
+        # durable up to the returned log sequence number
+        with self._lock:
+            if self._pending:
+                self._write_group()
+            return self.lsn
+
+    def close(self):
+        self.commit()
+        self._file.close()
+
+    def metrics(self):
+        return {
+            'lsn': self.lsn,
+            'records': self.records,
+            'groups': self.groups,
+            'fsyncs': self.fsyncs,
+            'bytes': self.bytes,
+            'pending': self._pending,
+        }
+
+    def _write_group(self):
+        self._file.write(self._buffer)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+
+        self.bytes += len(self._buffer)
+        self.groups += 1
+        self._buffer = bytearray()
+        self._pending = 0
+        self._oldest = None
+
+    @staticmethod
+    def read(path, after_lsn=0):
+        """Yield (lsn, operation, row id, values) records with lsn above `after_lsn`.
+
+        Reading stops at the first truncated or corrupted record, which is
+        the torn tail of a group that was being written during a crash.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        for _, lsn, payload in WriteAheadLog._records(data):
+            if lsn > after_lsn:
+                yield (lsn, *pickle.loads(payload))
+
+    @staticmethod
+    def repair(path):
+        """Cut a torn tail off the log at `path`, returns the length kept.
+
+        Records appended after a torn record would never be read back, so a
+        log is repaired before it is appended to again.
+        """
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        valid = 0
+        for valid, _, _ in WriteAheadLog._records(data):
+            pass
+
+        if valid < len(data):
+            with open(path, 'r+b') as file:
+                file.truncate(valid)
+                file.flush()
+                os.fsync(file.fileno())
+
+        return valid
+
+    @staticmethod
+    def _records(data):
+        # (end offset, lsn, payload) of every intact record up to the first torn one
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, checksum, lsn = RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return
+
+            offset += RECORD_HEADER.size + length
+            yield offset, lsn, payload
+
+
+def write_checkpoint(agds, path, lsn):
+    """Write a compact image of `agds` as of log sequence number `lsn`.
+
+    Every attribute is stored as its sorted keys, their counts and the
+    adjacency to rows as dense row indexes (flat array plus offsets). The
+    file is written next to `path` and renamed, so a crash leaves either
+    the old or the new checkpoint.
+    """
+    attributes = {}
+    for col in list(agds.attributes):
+        container = agds.attributes[col]
+        keys, counts, offsets, rows = [], [], [0], []
+        for element in container:
+            keys.append(element.key)
+            counts.append(element.count)
+            rows.extend(row_index(row_id) for row_id, _ in linked_rows(element))
+            offsets.append(len(rows))
+
+        nulls = container.nulls
+        attributes[col] = {
+            'nominal': isinstance(container, NominalValues),
+            'keys': keys,
+            'counts': np.array(counts, dtype=np.int64),
+            'offsets': np.array(offsets, dtype=np.int64),
+            'rows': np.array(rows, dtype=np.int64),
+            'nulls': (nulls.count, np.array([row_index(row_id) for row_id, _ in linked_rows(nulls)], dtype=np.int64))
+            if nulls is not None else None,
+        }
+
+    image = {
+        'lsn': lsn,
+        'next_row': agds._next_row,
+        'rows': np.array([row_index(row_id) for row_id in agds.rows], dtype=np.int64),
+        'collapsed': {row_id: (rn._count, rn._indices) for row_id, rn in agds.rows.items() if rn._indices is not None},
+        'attributes': attributes,
+        'indexes': list(agds.indexes),
+    }
+
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as file:
+        pickle.dump(image, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path, agds):
+    # restore the checkpoint image into an empty `agds`, returns its lsn
+    with open(path, 'rb') as file:
+        image = pickle.load(file)
+
+    for index in image['rows'].tolist():
+        agds.rows[f'O{index}'] = RowNode(f'O{index}')
+    for row_id, (count, indices) in image['collapsed'].items():
+        rn = agds.rows[row_id]
+        rn._count, rn._indices = count, indices
+        if count > 1:
+            agds._collapsed[row_id] = rn
+
+    for col, stored in image['attributes'].items():
+        container = NominalValues() if stored['nominal'] else agds._ordered()
+        offsets = stored['offsets'].tolist()
+        rows = stored['rows'].tolist()
+
+        for i, (key, count) in enumerate(zip(stored['keys'], stored['counts'].tolist())):
+            _link_restored(container, key, count, col, rows[offsets[i]:offsets[i + 1]], agds.rows)
+        if stored['nulls'] is not None:
+            count, null_rows = stored['nulls']
+            _link_restored(container, None, count, col, null_rows.tolist(), agds.rows)
+
+        agds.attributes[col] = container
+
+    agds._next_row = image['next_row']
+    agds._rows_version += 1
+    for attributes in image['indexes']:
+        # plain AGDS method, restoring an index is not a logged mutation
+        AGDS.create_index(agds, *attributes)
+
+    return image['lsn']
+
+
+def _link_restored(container, key, count, col, row_indexes, rows):
+    # one insert per distinct key, the stored count is set directly
+    element = container.insert(key)
+    element.count = count
+    if key is not None:
+        container.total += count - 1
+
+    for index in row_indexes:
+        rn = rows[f'O{index}']
+        setattr(rn, col, element)
+        setattr(element, rn._hash_key, rn)
+
+
+class DurableAGDS(AGDS):
+    """AGDS whose row mutations survive a crash.
+
+    add_row, delete_row, update_row, create_index and drop_index are
+    appended to a write-ahead log in
+    `directory` after they are applied. A mutation is durable once commit()
+    returned, the log groups records and fsyncs once per group so logging
+    keeps up with ingestion. checkpoint() writes a compact image of the
+    graph and starts a new log segment, older segments and checkpoints are
+    removed. Builds from frames, records and matrices are not logged, a
+    checkpoint is taken after each of them instead. Every
+    `checkpoint_every` logged mutations a checkpoint is taken as well.
+
+    A DurableAGDS created over a directory which already holds checkpoints
+    or log segments recovers from them, as DurableAGDS.recover(directory)
+    does: the latest checkpoint is loaded and the log tail written after it
+    replayed. A torn record at the end of the log is cut off before new
+    records are appended.
+    """
+
+    def __init__(self, directory, group_size=64, max_delay=0.01, sync=True, checkpoint_every=None, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self.sync = sync
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(directory, exist_ok=True)
+
+        self.log = None
+        self._checkpoint_lsn = 0
+
+        # a fresh log over existing segments would restart sequence numbers and break recovery
+        if self._checkpoints() or self._segments():
+            self._recover()
+
+    @classmethod
+    def recover(cls, directory, **kwargs):
+        # same as the constructor, which recovers whatever `directory` holds
+        return cls(directory, **kwargs)
+
+    def _recover(self):
+        """Rebuild the graph from the latest checkpoint and the log written after it.
+
+        Log records are replayed in batches of `group_size` mutations; a torn
+        record at the end of the log ends the replay.
+        """
+        checkpoints = self._checkpoints()
+        lsn = read_checkpoint(checkpoints[-1], self) if checkpoints else 0
+        self._checkpoint_lsn = lsn
+
+        batch = []
+        for segment in self._segments():
+            WriteAheadLog.repair(segment)
+            for record in WriteAheadLog.read(segment, after_lsn=lsn):
+                batch.append(record)
+                if len(batch) >= self.group_size:
+                    lsn = self._replay(batch)
+                    batch = []
+        if batch:
+            lsn = self._replay(batch)
+
+        self._open_log(lsn)
+
+    def add_row(self, mapping):
+        row_id = super().add_row(mapping)
+        self._append('add', row_id, dict(mapping))
+        return row_id
+
+    def delete_row(self, row_id):
+        super().delete_row(row_id)
+        self._append('delete', row_id)
+
+    def update_row(self, row_id, changes):
+        super().update_row(row_id, changes)
+        self._append('update', row_id, dict(changes))
+
+    def create_index(self, *attributes):
+        index = super().create_index(*attributes)
+        self._append('create_index', None, attributes)
+        return index
+
+    def drop_index(self, *attributes):
+        super().drop_index(*attributes)
+        self._append('drop_index', None, attributes)
+
+    def build_from_pandas(self, *args, **kwargs):
+        super().build_from_pandas(*args, **kwargs)
+        self.checkpoint()
+
+    def build_from_triples(self, *args, **kwargs):
+        super().build_from_triples(*args, **kwargs)
+        self.checkpoint()
+
+    def commit(self):
+        return self.log.commit() if self.log is not None else self._checkpoint_lsn
+
+    def checkpoint(self):
+        lsn = self.log.commit() if self.log is not None else self._checkpoint_lsn
+        write_checkpoint(self, os.path.join(self.directory, CHECKPOINT_PATTERN.format(lsn)), lsn)
+        self._checkpoint_lsn = lsn
+
+        if self.log is not None:
+            self.log.close()
+        for path in self._segments() + self._checkpoints()[:-1]:
+            os.remove(path)
+        self._open_log(lsn)
+        return lsn
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def _append(self, operation, row_id, values=None):
+        if self.log is None:
+            self._open_log(self._checkpoint_lsn)
+
+        lsn = self.log.append(operation, row_id, values)
+        if self.checkpoint_every is not None and lsn - self._checkpoint_lsn >= self.checkpoint_every:
+            self.checkpoint()
+
+    def _open_log(self, lsn):
+        path = os.path.join(self.directory, LOG_PATTERN.format(lsn + 1))
+        self.log = WriteAheadLog(path, lsn, self.group_size, self.max_delay, self.sync)
+
+    def _replay(self, batch):
+        # applied through the plain AGDS mutations, replayed records are not logged again
+        for lsn, operation, row_id, values in batch:
+            if operation == 'add':
+                added = AGDS.add_row(self, values)
+                if added != row_id:
+                    raise ValueError(f'log record {lsn} added {row_id}, replay produced {added}')
+            elif operation == 'delete':
+                AGDS.delete_row(self, row_id)
+            elif operation == 'update':
+                AGDS.update_row(self, row_id, values)
+            elif operation == 'create_index':
+                AGDS.create_index(self, *values)
+            else:
+                AGDS.drop_index(self, *values)
+
+        return batch[-1][0]
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'wal-*.log')))
+
+    def _checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'checkpoint-*.pkl')))
@@ -1,6 +1,23 @@
+import heapq
+import sys
+import threading
+import weakref
+from bisect import bisect_left, bisect_right
 from decimal import Decimal
+from itertools import accumulate
 
-ACCEPTED_TYPES_FOR_COMPARISON = (int, float, str)
+ACCEPTED_TYPES_FOR_COMPARISON = (int, float, str, tuple)
+
+
+def is_null(key):
+    # None, NaN, NaT and pandas NA never take part in ordering
+    if key is None:
+        return True
+    try:
+        return bool(key != key)
+    except TypeError:
+        # pandas NA refuses conversion to bool
+        return True
 
 
 class ASABaseElem:
@@ -14,7 +31,7 @@ class ASABaseElem:
         return hash(self.key)
 
     def __eq__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, ASABaseElem):
             return self.key == other.key
         if isinstance(other, ACCEPTED_TYPES_FOR_COMPARISON):
             return self.key == other
@@ -22,21 +39,21 @@ class ASABaseElem:
         return False
 
     def __lt__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, ASABaseElem):
             return self.key < other.key
         if isinstance(other, ACCEPTED_TYPES_FOR_COMPARISON):
             return self.key < other
         raise TypeError(f'< not supported between instances of {self.__class__.__name__} and {type(other).__name__}')
 
     def __gt__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, ASABaseElem):
             return self.key > other.key
         if isinstance(other, ACCEPTED_TYPES_FOR_COMPARISON):
             return self.key > other
         raise TypeError(f'< not supported between instances of {self.__class__.__name__} and {type(other).__name__}')
 
     def __ge__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, ASABaseElem):
             return self.key >= other.key
         if isinstance(other, ACCEPTED_TYPES_FOR_COMPARISON):
             return self.key >= other
@@ -97,12 +114,13 @@ class SortedDQueue:
         return new_elem
 
     def delete(self, element):
-        if element == self.max:
+        if element is self.max:
             self.max = element.predecessor
-        elif element == self.min:
+        if element is self.min:
             self.min = element.successor
 
         element.delete(element)
+        self.len -= 1
 
     def __iter__(self):
         current = self.min
@@ -196,6 +214,26 @@ class ASA:
         self.root = None
         self.sorted_d_queue = SortedDQueue()
         self.t = 1
+        # bumped on every mutation, lets dependants detect stale derived data
+        self.version = 0
+        # element counting null keys, kept outside of the tree and sorted queue
+        self.nulls = None
+        # maintained on every mutation so stats() needs no walk
+        self.nodes = 0
+        self.total = 0
+        # snapshots not read yet, they rewind the tree through the undo log on first read
+        self._snapshots = weakref.WeakSet()
+        # (key or None for nulls, +1 / -1) of every write since the oldest unread snapshot,
+        # _undo[0] is write number _undo_base
+        self._undo = []
+        self._undo_base = 0
+        self._snapshot_lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.sorted_d_queue)
+
+    def __len__(self):
+        return len(self.sorted_d_queue)
 
     @property
     def min(self):
@@ -228,34 +266,127 @@ class ASA:
 
         return self._median(left.count - right.count, left, right)
 
-    def _median(self, p, left, right):
-        if p > 0:
-            if left.successor is right:
-                return left.key
-            else:
+    @staticmethod
+    def _median(p, left, right):
+        # walks both ends towards each other, iterative so distinct-heavy trees don't hit the recursion limit
+        while True:
+            if p > 0:
+                if left.successor is right:
+                    return left.key
                 right = right.predecessor
                 p -= right.count
-                return self._median(p, left, right)
 
-        elif p < 0:
-            if left.successor is right:
-                return right.key
-            else:
+            elif p < 0:
+                if left.successor is right:
+                    return right.key
                 left = left.successor
                 p += left.count
-                return self._median(p, left, right)
-        else:
-            if left.successor is right:
-                return (left.key + right.key) / 2
+
             else:
+                if left.successor is right:
+                    return (left.key + right.key) / 2
                 if left.successor == right.predecessor:
-                    return left.successor
+                    return left.successor.key
 
                 left = left.successor
                 right = right.predecessor
-                return self._median(left.count - right.count, left, right)
+                p = left.count - right.count
+
+    def stats(self):
+        """Shape and estimated footprint of the tree, cheap enough to poll.
+
+        Node, key and record counts are maintained by insert and delete and
+        the height is read along the leftmost path, so no full walk is done.
+        `fill_factor` is the share of key slots in use across nodes and
+        `bytes` estimates nodes and elements, without keys and row links.
+        """
+        height = 0
+        node = self.root
+        while node is not None:
+            height += 1
+            node = None if node.leaf else node.children[0]
+
+        distinct = len(self.sorted_d_queue)
+        nulls = self.nulls.count if self.nulls is not None else 0
+        return {
+            'height': height,
+            'nodes': self.nodes,
+            'distinct': distinct,
+            'total': self.total,
+            'nulls': nulls,
+            'fill_factor': distinct / (self.nodes * 2 * self.t) if self.nodes else 0.0,
+            'bytes': self.nodes * NODE_BYTES + (distinct + (self.nulls is not None)) * ELEMENT_BYTES,
+        }
+
+    def snapshot(self):
+        """Immutable point-in-time view of the tree, see ASASnapshot.
+
+        Taking it is O(1) and writes stay O(log n): while a snapshot is
+        unread, every insert and delete only appends its (key, +1 / -1) to an
+        undo log. The first read of the snapshot copies the current n
+        distinct keys and reverts the d writes logged since it was taken,
+        O(n + d log d), afterwards it answers from its own flat lists. The
+        log is dropped once no unread snapshot needs it, a snapshot left
+        unread keeps it growing with every write.
+        """
+        with self._snapshot_lock:
+            snapshot = ASASnapshot(self, self._undo_base + len(self._undo))
+            self._snapshots.add(snapshot)
+        return snapshot
+
+    def _log_write(self, key, delta):
+        if self._snapshots:
+            self._undo.append((key, delta))
+        elif self._undo:
+            self._undo_base += len(self._undo)
+            self._undo = []
+
+    def _capture(self):
+        keys, counts = [], []
+        for element in self.sorted_d_queue:
+            keys.append(element.key)
+            counts.append(element.count)
+
+        return keys, counts, self.nulls.count if self.nulls is not None else 0
+
+    def _freeze_snapshot(self, snapshot):
+        with self._snapshot_lock:
+            # re-checked here, another reader may have frozen the snapshot since the caller looked
+            if snapshot._tree is not self:
+                return
+
+            snapshot._freeze(self._rewind(snapshot._position))
+            self._snapshots.discard(snapshot)
+
+            # log entries older than every unread snapshot are not needed anymore
+            oldest = min((unread._position for unread in self._snapshots), default=self._undo_base + len(self._undo))
+            del self._undo[:oldest - self._undo_base]
+            self._undo_base = oldest
+
+    def _rewind(self, position):
+        # keys, counts and nulls as they were before write number `position`
+        keys, counts, nulls = self._capture()
+        changes = {}
+        for key, delta in self._undo[position - self._undo_base:]:
+            changes[key] = changes.get(key, 0) - delta
+        if not changes:
+            return keys, counts, nulls
+
+        nulls += changes.pop(None, 0)
+        current = dict(zip(keys, counts))
+        rewound_keys, rewound_counts = [], []
+        for key in heapq.merge(keys, sorted(key for key in changes if key not in current)):
+            count = current.get(key, 0) + changes.get(key, 0)
+            if count:
+                rewound_keys.append(key)
+                rewound_counts.append(count)
+
+        return rewound_keys, rewound_counts, nulls
 
     def search(self, key):
+        if is_null(key):
+            return (self.nulls, None) if self.nulls is not None else (False, None)
+
         if self.root is None:
             return False, self.root
 
@@ -276,13 +407,71 @@ class ASA:
 
         return self._search(key, node.children[-1])
 
+    def lower_bound(self, key):
+        # first element with element.key >= key, None when every key is smaller
+        candidate = None
+        node = self.root
+
+        while node is not None:
+            ch_index = len(node.keys)
+            for i, k in enumerate(node.keys):
+                if k == key:
+                    return k
+                elif key < k:
+                    candidate = k
+                    ch_index = i
+                    break
+
+            node = None if node.leaf else node.children[ch_index]
+
+        return candidate
+
+    def scan(self, low=None, high=None, include_low=True, include_high=True):
+        current = self.min if low is None else self.lower_bound(low)
+
+        if current is not None and low is not None and not include_low and current == low:
+            current = current.successor
+
+        while current is not None:
+            if high is not None and (current > high or (not include_high and current == high)):
+                return
+            yield current
+            current = current.successor
+
     def insert(self, key):
+        self.version += 1
+
+        if is_null(key):
+            self._log_write(None, 1)
+            return self._insert_null()
+
+        self._log_write(key, 1)
+
+        self.total += 1
         if self.root is None:
             self.root = ASATreeNode(True)
+            self.nodes += 1
             return self.root.add_new(key, self.sorted_d_queue)
 
         return self._insert(key, self.root)
 
+    def _insert_null(self):
+        if self.nulls is None:
+            self.nulls = ASABaseElem(None)
+        else:
+            self.nulls.count += 1
+
+        return self.nulls
+
+    def _delete_null(self):
+        self.version += 1
+        if self.nulls.count > 1:
+            self.nulls.count -= 1
+            return True
+
+        removed, self.nulls = self.nulls, None
+        return removed
+
     def _insert(self, key, node):
         if node.leaf:
             added = node.add_new(key, self.sorted_d_queue)
@@ -299,6 +488,7 @@ class ASA:
 
     def _create_new_root(self, median_key, left_child, right_child):
         new_root = ASATreeNode()
+        self.nodes += 1
         new_root.keys.append(median_key)
 
         left_child.parent = new_root
@@ -333,6 +523,7 @@ class ASA:
     def _split_and_propagate(self, node):
         promoted_element, left_child, right_child = ASATreeNode.split_from_node(node)
         parent = node.parent
+        self.nodes += 1
 
         if parent is None:
             self._create_new_root(promoted_element, left_child, right_child)
@@ -347,6 +538,12 @@ class ASA:
     def delete(self, key):
         empty_leaf = False
 
+        if is_null(key):
+            if self.nulls is None:
+                return False
+            self._log_write(None, -1)
+            return self._delete_null()
+
         if self.root is None:
             return False
 
@@ -354,12 +551,25 @@ class ASA:
         if key is False:
             return False
 
-        elif key.count > 1:
+        self._log_write(key.key, -1)
+
+        self.version += 1
+        self.total -= 1
+
+        if key.count > 1:
             key.count -= 1
             return True
 
         elif node.leaf:
-            if len(node.keys) > 1:
+            if node is self.root:
+                # root leaf can hold a single key, nothing to rebalance
+                node.keys.remove(key)
+                self.sorted_d_queue.delete(key)
+                if not node.keys:
+                    self.root = None
+                    self.nodes -= 1
+                return True
+            elif len(node.keys) > 1:
                 node.keys.remove(key)
                 self.sorted_d_queue.delete(key)
                 return key
@@ -393,6 +603,8 @@ class ASA:
         predecessor, p_node = self.search(elem.predecessor)
         successor, s_node = self.search(elem.successor)
 
+        self.sorted_d_queue.len -= 1
+
         def replace_from_predecessor():
             predecessor.successor = elem.successor
             elem.successor.predecessor = predecessor
@@ -427,21 +639,23 @@ class ASA:
         replace_from_predecessor()
         return p_node
 
-    def _try_siblings(self, empty_leaf):
-        parent = empty_leaf.parent
+    @staticmethod
+    def _adjacent_candidate(node):
+        # sibling next to the node which can spare a key, right one is preferred
+        parent = node.parent
+        index = parent.children.index(node)
 
-        c_ind = None
-        candidate = None
-        empty_index = None
+        for c_ind in (index + 1, index - 1):
+            if 0 <= c_ind < len(parent.children) and len(parent.children[c_ind].keys) > 1:
+                return c_ind, parent.children[c_ind], index
 
-        for i, ch in enumerate(parent.children):
-            if len(ch.keys) > 1:
-                c_ind = i
-                candidate = ch
-            elif empty_leaf == ch:
-                empty_index = i
+        return None, None, index
+
+    def _try_siblings(self, empty_leaf):
+        parent = empty_leaf.parent
+        c_ind, candidate, empty_index = self._adjacent_candidate(empty_leaf)
 
-        if candidate and abs(c_ind - empty_index) == 1:
+        if candidate:
             ch_draw_ind = int(bool(c_ind - empty_index < 0))
             parent.keys.insert(c_ind, candidate.keys.pop(ch_draw_ind))
             empty_leaf.keys.append(parent.keys.pop(empty_index))
@@ -465,6 +679,7 @@ class ASA:
                 parent.children[1].keys.append(parent.keys.pop(1))
 
             parent.children.remove(e_leaf)
+            self.nodes -= 1
             return True
         return False
 
@@ -484,27 +699,19 @@ class ASA:
             parent.keys.insert(sibling_index, parent.children[sibling_index].keys[0])
             parent.children = []
             parent.leaf = True
+            self.nodes -= 2
         return parent
 
     def _rebalance_from_sibling(self, c_subtree):
         parent = c_subtree.parent
+        c_ind, candidate, empty_index = self._adjacent_candidate(c_subtree)
 
-        c_ind = None
-        candidate = None
-        empty_index = None
-
-        for i, ch in enumerate(parent.children):
-            if len(ch.keys) > 1 and c_subtree != ch:
-                c_ind = i
-                candidate = ch
-            elif c_subtree == ch:
-                empty_index = i
-
-        if candidate and abs(c_ind - empty_index) == 1:
+        if candidate:
             ch_draw_ind = int(bool(c_ind - empty_index < 0))
             parent.keys.insert(c_ind, candidate.keys.pop(ch_draw_ind))
 
             new_leaf = ASATreeNode(parent=parent)
+            self.nodes += 1
             new_leaf.keys.append(parent.keys.pop(empty_index))
             parent.children[empty_index] = new_leaf
 
@@ -520,6 +727,9 @@ class ASA:
                 new_leaf.children.append(c_subtree)
                 new_leaf.children.append(candidate.children.pop(0))
 
+            for ch in new_leaf.children:
+                ch.parent = new_leaf
+
             return True
 
         # no candidate found
@@ -545,9 +755,13 @@ class ASA:
         else:
             closest_sibling.children.insert(0, c_subtree)
 
+        c_subtree.parent = closest_sibling
+        parent.children.pop(reduced_index)
+
         if len(parent.keys) > 0:
-            return True
+            return False
 
+        self.nodes -= 1
         grandparent = parent.parent
         if grandparent is None:
             self.root = closest_sibling
@@ -578,6 +792,153 @@ class ASA:
         self._rebalance(unbalanced_node)
 
 
+class ASASnapshot:
+    """Read only version of an ASA as it was when ASA.snapshot() was called.
+
+    On first read the snapshot rebuilds the tree content at its version,
+    see ASA.snapshot, and from then on keeps sorted keys with their counts
+    in flat lists and answers searches, scans and aggregates by bisection,
+    so it never sees later writes. A read snapshot can be handed to worker
+    threads. An unread one rebuilds from the live tree, which races with
+    writes on other threads unless the tree is a LockedASA, whose readers
+    exclude writers. Elements it returns are detached copies without
+    successors or row links.
+    """
+
+    def __init__(self, tree, position=0):
+        self._tree = tree
+        # number of tree writes before the snapshot, where its undo starts
+        self._position = position
+        self.version = tree.version if tree is not None else None
+        self._keys = self._counts = self._cumulative = None
+        self._nulls = 0
+
+    @classmethod
+    def from_counts(cls, keys, counts, nulls=0):
+        # detached snapshot over sorted keys and their counts, e.g. merged from several trees
+        snapshot = cls(None)
+        snapshot._freeze((list(keys), list(counts), nulls))
+        return snapshot
+
+    def _freeze(self, captured):
+        self._keys, self._counts, self._nulls = captured
+        self._tree = None
+
+    def _data(self):
+        tree = self._tree
+        if tree is not None:
+            # current content of the tree with the writes since the snapshot reverted
+            tree._freeze_snapshot(self)
+        return self._keys, self._counts
+
+    def _element(self, i):
+        return ASABaseElem(self._keys[i], self._counts[i])
+
+    def _prefix_counts(self):
+        if self._cumulative is None:
+            self._cumulative = list(accumulate(self._data()[1]))
+        return self._cumulative
+
+    def __iter__(self):
+        self._data()
+        return (self._element(i) for i in range(len(self._keys)))
+
+    def __len__(self):
+        return len(self._data()[0])
+
+    @property
+    def nulls(self):
+        self._data()
+        return ASABaseElem(None, self._nulls) if self._nulls else None
+
+    @property
+    def total(self):
+        cumulative = self._prefix_counts()
+        return cumulative[-1] if cumulative else 0
+
+    @property
+    def min(self):
+        return self._element(0) if self._data()[0] else None
+
+    @property
+    def max(self):
+        return self._element(-1) if self._data()[0] else None
+
+    @property
+    def sum(self):
+        keys, counts = self._data()
+        return sum(key * count for key, count in zip(keys, counts))
+
+    @property
+    def avr(self):
+        if not self._data()[0]:
+            return
+
+        return self.sum / len(self._keys)
+
+    @property
+    def median(self):
+        cumulative = self._prefix_counts()
+        if not cumulative:
+            return None
+
+        total = cumulative[-1]
+        upper = self._keys[bisect_right(cumulative, total // 2)]
+        if total % 2:
+            return upper
+
+        lower = self._keys[bisect_right(cumulative, total // 2 - 1)]
+        return upper if lower == upper else (lower + upper) / 2
+
+    def quantile(self, q):
+        # linear interpolation between the closest ranks, quantile(0.5) equals median up to rounding
+        cumulative = self._prefix_counts()
+        if not cumulative:
+            return None
+
+        position = q * (cumulative[-1] - 1)
+        lower = int(position)
+        low_key = self._keys[bisect_right(cumulative, lower)]
+        if position == lower:
+            return low_key
+
+        high_key = self._keys[bisect_right(cumulative, lower + 1)]
+        return low_key + (high_key - low_key) * (position - lower)
+
+    def search(self, key):
+        if is_null(key):
+            return (self.nulls, None) if self.nulls is not None else (False, None)
+
+        keys, _ = self._data()
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self._element(i), None
+        return False, None
+
+    def lower_bound(self, key):
+        keys, _ = self._data()
+        i = bisect_left(keys, key)
+        return self._element(i) if i < len(keys) else None
+
+    def scan(self, low=None, high=None, include_low=True, include_high=True):
+        keys, _ = self._data()
+        start = 0 if low is None else (bisect_left if include_low else bisect_right)(keys, low)
+        stop = len(keys) if high is None else (bisect_right if include_high else bisect_left)(keys, high)
+
+        for i in range(start, stop):
+            yield self._element(i)
+
+
+def footprint(obj):
+    # shallow size of an object together with its attribute dict
+    return sys.getsizeof(obj) + sys.getsizeof(vars(obj))
+
+
+# estimated size of a node with its key and children lists, and of an element without row links
+NODE_BYTES = footprint(ASATreeNode()) + 2 * sys.getsizeof([None] * 3)
+ELEMENT_BYTES = footprint(ASABaseElem(0))
+
+
 if __name__ == '__main__':
     asa = ASA()
 
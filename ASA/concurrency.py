@@ -0,0 +1,187 @@
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+from ASA.ASA_tree_and_d_queue import ASA
+
+
+class RWLock:
+    """Reader-writer lock, many readers or a single writer.
+
+    Writers are preferred: once a writer waits, new readers queue behind it,
+    so a steady stream of queries cannot starve ingestion. Both sides are
+    reentrant for the thread holding them and the writer may also read.
+    Contention is counted, see `metrics`.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+        self.reads = 0
+        self.writes = 0
+        self.contended_reads = 0
+        self.contended_writes = 0
+        self.read_wait = 0.0
+        self.write_wait = 0.0
+        self.max_readers = 0
+        self.batches = 0
+        self.batched_operations = 0
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        depth = getattr(self._local, 'reads', 0)
+        if depth or self._writer == me:
+            # nested read of a reader or of the writer itself
+            self._local.reads = depth + 1
+            return
+
+        with self._condition:
+            self.reads += 1
+            if self._writer is not None or self._waiting_writers:
+                self.contended_reads += 1
+                start = self.clock()
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self.read_wait += self.clock() - start
+
+            self._readers += 1
+            self.max_readers = max(self.max_readers, self._readers)
+        self._local.reads = 1
+
+    def release_read(self):
+        self._local.reads -= 1
+        if self._local.reads or self._writer == threading.get_ident():
+            return
+
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if getattr(self._local, 'reads', 0):
+            raise RuntimeError('read lock cannot be upgraded to a write lock')
+
+        with self._condition:
+            self.writes += 1
+            if self._writer is not None or self._readers:
+                self.contended_writes += 1
+                start = self.clock()
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting_writers -= 1
+                self.write_wait += self.clock() - start
+
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        self._writer_depth -= 1
+        if self._writer_depth:
+            return
+
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def batch(self, operations):
+        # one write lock acquisition for `operations` writes
+        with self.write():
+            self.batches += 1
+            self.batched_operations += operations
+            yield
+
+    def metrics(self):
+        return {
+            'reads': self.reads,
+            'writes': self.writes,
+            'contended_reads': self.contended_reads,
+            'contended_writes': self.contended_writes,
+            'read_wait_seconds': self.read_wait,
+            'write_wait_seconds': self.write_wait,
+            'max_readers': self.max_readers,
+            'batches': self.batches,
+            'batched_operations': self.batched_operations,
+        }
+
+
+def locked(method, mode):
+    """Wrap `method` to run under the read or write side of `self.lock`.
+
+    Generators are drained while the lock is held, a lazily consumed
+    iterator would otherwise walk the structure after the lock is released.
+    """
+    def wrapper(self, *args, **kwargs):
+        with getattr(self.lock, mode)():
+            result = method(self, *args, **kwargs)
+            if inspect.isgenerator(result):
+                result = iter(list(result))
+            return result
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class LockedASA(ASA):
+    """ASA safe to share between threads.
+
+    Searches, scans and aggregates run under the read side of `lock`,
+    insert and delete under the write side, so a split or rebalance never
+    tears a tree a reader is walking. insert_many and delete_many take the
+    write lock once for the whole batch. Pick it over ASA at construction
+    time, the plain class carries no locking.
+    """
+
+    def __init__(self, lock=None):
+        super().__init__()
+        self.lock = lock if lock is not None else RWLock()
+
+    def insert_many(self, keys):
+        keys = list(keys)
+        with self.lock.batch(len(keys)):
+            return [self.insert(key) for key in keys]
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self.lock.batch(len(keys)):
+            return [self.delete(key) for key in keys]
+
+
+for _name in ('search', 'lower_bound', 'scan', 'stats', 'snapshot', '_capture', '_freeze_snapshot', '__iter__', '__len__'):
+    setattr(LockedASA, _name, locked(getattr(ASA, _name), 'read'))
+
+for _name in ('min', 'max', 'sum', 'avr', 'median'):
+    setattr(LockedASA, _name, property(locked(getattr(ASA, _name).fget, 'read')))
+
+for _name in ('insert', 'delete'):
+    setattr(LockedASA, _name, locked(getattr(ASA, _name), 'write'))
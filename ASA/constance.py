@@ -1 +1 @@
-ACCEPTED_TYPES_FOR_COMPARISON = (int, float, str)
+ACCEPTED_TYPES_FOR_COMPARISON = (int, float, str, tuple)
@@ -0,0 +1,133 @@
+from collections import Counter
+
+from ASA.ASA_tree_and_d_queue import ASA, ASABaseElem, SortedDQueue
+
+# structural ASA methods taking the affected node, counted and reported to hooks under their name without the underscore
+STRUCTURAL_EVENTS = (
+    '_split_and_propagate',
+    '_try_siblings',
+    '_parent_resolution',
+    '_collapse',
+    '_rebalance',
+    '_rebalance_from_sibling',
+    '_join_with_sibling',
+)
+
+
+class CountingElem(ASABaseElem):
+    """ASABaseElem counting every comparison into the `counters` of its class.
+
+    Each InstrumentedASA derives its own subclass bound to its counters, so
+    plain elements keep no reference and pay nothing.
+    """
+    counters = None
+
+    __hash__ = ASABaseElem.__hash__
+
+    def __eq__(self, other):
+        self.counters['comparisons'] += 1
+        return super().__eq__(other)
+
+    def __lt__(self, other):
+        self.counters['comparisons'] += 1
+        return super().__lt__(other)
+
+    def __gt__(self, other):
+        self.counters['comparisons'] += 1
+        return super().__gt__(other)
+
+    def __ge__(self, other):
+        self.counters['comparisons'] += 1
+        return super().__ge__(other)
+
+
+class CountingDQueue(SortedDQueue):
+    # sorted queue creating counting elements and counting relinks of its doubly linked list
+    def __init__(self, element_class, counters):
+        super().__init__()
+        self.element_class = element_class
+        self.counters = counters
+
+    def add_first(self, key):
+        new_elem = self.element_class(key)
+        self.min = new_elem
+        self.max = new_elem
+        self.len += 1
+        return new_elem
+
+    def add_neighbour(self, key, element):
+        self.counters['relinks'] += 1
+        new_elem = self.element_class(key)
+        self.len += 1
+
+        if element.key > new_elem.key:
+            new_elem.link_before(element, self)
+        else:
+            new_elem.link_after(element, self)
+
+        return new_elem
+
+    def delete(self, element):
+        self.counters['relinks'] += 1
+        super().delete(element)
+
+
+def _structural(name):
+    method = getattr(ASA, name)
+    event = name.lstrip('_')
+
+    def counted(self, node, *args):
+        self.counters[event] += 1
+        result = method(self, node, *args)
+        for hook in self.hooks:
+            hook(event, self, node)
+        return result
+
+    counted.__name__ = name
+    return counted
+
+
+class InstrumentedASA(ASA):
+    """ASA counting its work, for profiling slow ingests.
+
+    `counters` holds key comparisons, node visits of search and insert
+    descents, sorted queue relinks and one entry per structural operation
+    (split_and_propagate, try_siblings, parent_resolution, collapse,
+    rebalance, ...). Hooks are called as hook(event, tree, node) after every
+    structural operation. The plain ASA class is left untouched, so choosing
+    between the two when the container is constructed makes instrumentation
+    free when it is not used.
+    """
+
+    def __init__(self, hooks=()):
+        super().__init__()
+        self.counters = Counter()
+        self.hooks = list(hooks)
+        element_class = type('CountingElem', (CountingElem,), {'counters': self.counters})
+        self.sorted_d_queue = CountingDQueue(element_class, self.counters)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def reset_counters(self):
+        self.counters.clear()
+
+    def _search(self, key, node):
+        self.counters['node_visits'] += 1
+        return super()._search(key, node)
+
+    def _insert(self, key, node):
+        self.counters['node_visits'] += 1
+        return super()._insert(key, node)
+
+    def _replace_with_leaf_candidate(self, elem, elem_node):
+        # predecessor or successor is relinked in place of the deleted element
+        self.counters['relinks'] += 1
+        return super()._replace_with_leaf_candidate(elem, elem_node)
+
+
+for _name in STRUCTURAL_EVENTS:
+    setattr(InstrumentedASA, _name, _structural(_name))
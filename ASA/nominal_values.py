@@ -0,0 +1,94 @@
+import sys
+
+from ASA.ASA_tree_and_d_queue import ELEMENT_BYTES, ASABaseElem, is_null
+
+
+class NominalValues:
+    """Dict backed value container for categorical attributes.
+
+    Ordering between categories is meaningless, so there is no tree and no
+    sorted queue, only O(1) lookup and count maintenance. Elements are regular
+    ASABaseElem objects, so row links work exactly like for ASA elements.
+    Null keys share the `nulls` element kept outside of the values dict.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.version = 0
+        self.nulls = None
+        # records with a non null key, maintained for stats()
+        self.total = 0
+
+    def __iter__(self):
+        return iter(self.values.values())
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return str([repr(el) for el in self])
+
+    def stats(self):
+        # same keys as ASA.stats, a dict has no tree shape to report
+        nulls = self.nulls.count if self.nulls is not None else 0
+        return {
+            'height': 0,
+            'nodes': 0,
+            'distinct': len(self.values),
+            'total': self.total,
+            'nulls': nulls,
+            'fill_factor': None,
+            'bytes': sys.getsizeof(self.values) + (len(self.values) + (self.nulls is not None)) * ELEMENT_BYTES,
+        }
+
+    def search(self, key):
+        if is_null(key):
+            return (self.nulls, None) if self.nulls is not None else (False, None)
+
+        element = self.values.get(key)
+        if element is None:
+            return False, None
+
+        return element, None
+
+    def insert(self, key):
+        self.version += 1
+
+        if is_null(key):
+            if self.nulls is None:
+                self.nulls = ASABaseElem(None)
+            else:
+                self.nulls.count += 1
+            return self.nulls
+
+        self.total += 1
+        element = self.values.get(key)
+        if element is None:
+            element = ASABaseElem(key)
+            self.values[key] = element
+        else:
+            element.count += 1
+
+        return element
+
+    def delete(self, key):
+        if is_null(key):
+            element = self.nulls
+        else:
+            element = self.values.get(key)
+
+        if element is None:
+            return False
+
+        self.version += 1
+        if element is not self.nulls:
+            self.total -= 1
+        if element.count > 1:
+            element.count -= 1
+            return True
+
+        if element is self.nulls:
+            self.nulls = None
+        else:
+            del self.values[key]
+        return element
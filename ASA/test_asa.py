@@ -1,6 +1,7 @@
+import random
 import pytest
-from ASA.ASA_tree_and_d_queue import ASA, ASABaseElem
-from statistics import median
+from ASA.ASA_tree_and_d_queue import ASA, ASABaseElem, ASASnapshot
+from statistics import median, quantiles
 
 
 def check_structure(root_1, root_2):
@@ -655,3 +656,267 @@ def test_asa_with_strings(insert, root, min_, max_):
     assert asa.root.keys[0].key == root
     assert asa.min.key == min_
     assert asa.max.key == max_
+
+
+def test_delete_last_element_should_leave_empty_asa():
+    asa = ASA()
+    asa.insert(1)
+
+    assert asa.delete(1)
+
+    assert asa.root is None
+    assert asa.min is None and asa.max is None
+    assert len(asa.sorted_d_queue) == 0
+
+
+def collect_keys(node):
+    if node.leaf:
+        return [k.key for k in node.keys]
+
+    keys = []
+    for i, ch in enumerate(node.children):
+        assert ch.parent is node
+        keys.extend(collect_keys(ch))
+        if i < len(node.keys):
+            keys.append(node.keys[i].key)
+    return keys
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_inserts_and_deletes_should_keep_tree_and_queue_consistent(seed):
+    rnd = random.Random(seed)
+    asa = ASA()
+    counts = {}
+
+    for _ in range(300):
+        if rnd.random() < 0.55 or not counts:
+            key = rnd.randint(0, 60)
+            asa.insert(key)
+            counts[key] = counts.get(key, 0) + 1
+        else:
+            key = rnd.choice(list(counts))
+            assert asa.delete(key)
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+        expected = sorted(counts)
+        assert (collect_keys(asa.root) if asa.root else []) == expected
+        assert [(el.key, el.count) for el in asa.sorted_d_queue] == [(k, counts[k]) for k in expected]
+        assert len(asa.sorted_d_queue) == len(expected)
+
+
+@pytest.mark.parametrize(
+    'key, expected',
+    [(-1, 0), (0, 0), (3, 4), (4, 4), (9, 10), (16, 16), (17, None)]
+)
+def test_lower_bound_should_return_first_element_not_smaller_than_key(key, expected):
+    asa = ASA()
+    for i in range(0, 18, 2):
+        asa.insert(i)
+
+    found = asa.lower_bound(key)
+
+    if expected is None:
+        assert found is None
+    else:
+        assert found.key == expected
+
+
+def test_lower_bound_on_empty_asa_should_return_none():
+    assert ASA().lower_bound(1) is None
+
+
+@pytest.mark.parametrize(
+    'low, high, include_low, include_high, expected',
+    [
+        (None, None, True, True, [0, 2, 4, 6, 8]),
+        (2, 6, True, True, [2, 4, 6]),
+        (2, 6, False, False, [4]),
+        (3, 7, False, False, [4, 6]),
+        (None, 4, True, False, [0, 2]),
+        (5, None, True, True, [6, 8]),
+        (9, None, True, True, []),
+        (6, 2, True, True, []),
+    ]
+)
+def test_scan_should_yield_elements_in_range(low, high, include_low, include_high, expected):
+    asa = ASA()
+    for i in [4, 0, 8, 2, 6, 2]:
+        asa.insert(i)
+
+    assert [el.key for el in asa.scan(low, high, include_low, include_high)] == expected
+
+
+def test_version_should_change_on_every_mutation():
+    asa = ASA()
+    versions = [asa.version]
+
+    asa.insert(1)
+    versions.append(asa.version)
+    asa.insert(1)
+    versions.append(asa.version)
+    asa.delete(1)
+    versions.append(asa.version)
+
+    assert len(set(versions)) == 4
+
+    asa.delete(5)
+    assert asa.version == versions[-1]
+
+
+@pytest.mark.parametrize('null', [None, float('nan')])
+def test_null_keys_should_go_to_null_bucket(null):
+    asa = ASA()
+    for key in [2, null, 1, float('nan'), None]:
+        asa.insert(key)
+
+    assert [(el.key, el.count) for el in asa.sorted_d_queue] == [(1, 1), (2, 1)]
+    assert asa.root.keys == [1, 2]
+    assert asa.nulls.count == 3
+    assert asa.search(null) == (asa.nulls, None)
+    assert asa.sum == 3
+    assert asa.median == 1.5
+
+
+def test_delete_null_should_decrease_and_free_null_bucket():
+    asa = ASA()
+    asa.insert(float('nan'))
+    asa.insert(None)
+
+    assert asa.delete(float('nan')) is True
+    assert asa.nulls.count == 1
+    assert asa.delete(None)
+    assert asa.nulls is None
+    assert asa.delete(None) is False
+    assert asa.search(None) == (False, None)
+
+
+def _walk(node):
+    return 0 if node is None else 1 + sum(_walk(child) for child in node.children)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_stats_should_follow_mutations_without_walking(seed):
+    rnd = random.Random(seed)
+    asa = ASA()
+    live = []
+
+    for _ in range(300):
+        if live and rnd.random() < 0.45:
+            asa.delete(live.pop(rnd.randrange(len(live))))
+        else:
+            live.append(rnd.choice([rnd.randrange(100), None]))
+            asa.insert(live[-1])
+
+        stats = asa.stats()
+        assert stats['nodes'] == _walk(asa.root)
+        assert stats['total'] == sum(key is not None for key in live)
+        assert stats['nulls'] == live.count(None)
+        assert stats['distinct'] == len({key for key in live if key is not None})
+
+
+def test_stats_of_two_level_tree(two_level_tree):
+    stats = two_level_tree.stats()
+
+    assert (stats['height'], stats['nodes'], stats['distinct'], stats['total']) == (3, 7, 8, 8)
+    assert stats['fill_factor'] == pytest.approx(8 / 14)
+    assert stats['bytes'] > 0
+    assert ASA().stats()['fill_factor'] == 0.0
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_snapshot_should_keep_point_in_time_view(seed):
+    rnd = random.Random(seed)
+    asa = ASA()
+    keys = [rnd.randrange(40) for _ in range(rnd.randrange(1, 80))] + [None]
+    for key in keys:
+        asa.insert(key)
+
+    frozen_on_write, frozen_on_read = asa.snapshot(), asa.snapshot()
+    expected = [(el.key, el.count) for el in asa]
+    expected_median, expected_sum = asa.median, asa.sum
+    list(frozen_on_read)
+
+    for _ in range(30):
+        key = rnd.choice([rnd.randrange(-5, 45), None])
+        asa.insert(key) if rnd.random() < 0.5 else asa.delete(key)
+
+    for snapshot in (frozen_on_write, frozen_on_read):
+        assert [(el.key, el.count) for el in snapshot] == expected
+        assert snapshot.median == expected_median == median([key for key in keys if key is not None])
+        assert snapshot.sum == expected_sum
+        assert snapshot.nulls.count == 1
+        low, high = sorted([rnd.randrange(40), rnd.randrange(40)])
+        assert [el.key for el in snapshot.scan(low, high, include_low=False)] == [
+            key for key, _ in expected if low < key <= high
+        ]
+        assert snapshot.search(keys[0])[0].count == dict(expected)[keys[0]]
+        assert snapshot.search(-1) == (False, None)
+
+
+def test_snapshot_should_be_taken_in_constant_time_and_rewound_on_read(two_level_tree):
+    first, second = two_level_tree.snapshot(), two_level_tree.snapshot()
+
+    assert first._keys is None
+    two_level_tree.insert(7)
+    two_level_tree.delete(1)
+
+    assert first._keys is None and len(two_level_tree._undo) == 2
+    assert [el.key for el in first] == [el.key for el in second]
+    assert len(first) == 8 and first.min.key == 1 and first.max.key == 10
+    assert first.lower_bound(7).key == 9
+    assert first.version == second.version == two_level_tree.version - 2
+    assert len(two_level_tree.snapshot()) == 8 and two_level_tree.snapshot().min.key == 2
+
+
+def test_snapshot_from_counts_should_interpolate_quantiles():
+    snapshot = ASASnapshot.from_counts([1, 2, 5, 9], [2, 1, 3, 1], nulls=2)
+    values = [1, 1, 2, 5, 5, 5, 9]
+
+    assert snapshot.total == 7 and snapshot.nulls.count == 2
+    assert snapshot.median == snapshot.quantile(0.5) == median(values)
+    assert snapshot.quantile(0) == 1 and snapshot.quantile(1) == 9
+    assert [snapshot.quantile(q / 4) for q in (1, 2, 3)] == quantiles(values, method='inclusive')
+    assert ASASnapshot.from_counts([], []).quantile(0.5) is None
+
+
+def test_snapshot_read_should_not_refreeze_after_a_write_froze_it():
+    asa = ASA()
+    for key in (1, 2):
+        asa.insert(key)
+    snapshot = asa.snapshot()
+
+    # reader saw the snapshot unread, another reader froze it and a write followed before the first one captured
+    tree = snapshot._tree
+    asa.insert(3)
+    list(snapshot)
+    asa.insert(4)
+    tree._freeze_snapshot(snapshot)
+
+    assert [el.key for el in snapshot] == [1, 2]
+
+
+def test_snapshot_writes_should_only_log_and_reads_capture_once(monkeypatch):
+    asa = ASA()
+    captures = []
+    capture = asa._capture
+    monkeypatch.setattr(asa, '_capture', lambda: captures.append(1) or capture())
+
+    snapshots = []
+    # a snapshot per write, writes never copy the tree
+    for key in range(100):
+        snapshots.append(asa.snapshot())
+        asa.insert(key)
+    assert not captures and len(asa._undo) == 100
+
+    assert [len(snapshot) for snapshot in snapshots] == list(range(100))
+    assert len(captures) == 100
+    assert [len(snapshot) for snapshot in snapshots] == list(range(100))
+    assert len(captures) == 100 and asa._undo == []
+
+    # dropped snapshots keep no log
+    asa.snapshot()
+    asa.insert(100)
+    asa.insert(101)
+    assert asa._undo == []
@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+
+import pytest
+
+from ASA.concurrency import LockedASA, RWLock
+
+
+def test_readers_should_share_the_lock_and_writer_should_wait():
+    lock = RWLock()
+    inside = threading.Barrier(3)
+    written = []
+
+    def read():
+        with lock.read():
+            inside.wait()
+            time.sleep(0.05)
+
+    def write():
+        with lock.write():
+            written.append(lock.max_readers)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    inside.wait()
+    writer = threading.Thread(target=write)
+    writer.start()
+    for thread in [*readers, writer]:
+        thread.join()
+
+    metrics = lock.metrics()
+    assert written == [2]
+    assert metrics['reads'] == 2 and metrics['writes'] == 1
+    assert metrics['contended_writes'] == 1
+    assert metrics['write_wait_seconds'] > 0
+
+
+def test_lock_should_be_reentrant_for_its_holder():
+    lock = RWLock()
+
+    with lock.write():
+        with lock.write(), lock.read():
+            pass
+    with lock.read():
+        with lock.read():
+            pass
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+    with lock.write():
+        pass
+    assert lock.metrics()['writes'] == 2
+
+
+def test_locked_tree_should_stay_consistent_under_concurrent_readers():
+    asa = LockedASA()
+    asa.insert_many(range(500))
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                keys = [element.key for element in asa]
+                assert keys == sorted(keys)
+                asa.search(random.randrange(1000))
+                list(asa.scan(100, 200))
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+
+    rnd = random.Random(0)
+    for _ in range(20):
+        asa.insert_many(rnd.randrange(1000) for _ in range(50))
+        asa.delete_many(rnd.randrange(1000) for _ in range(50))
+
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert asa.lock.metrics()['batches'] == 41
+    assert asa.lock.metrics()['batched_operations'] == 500 + 40 * 50
+
+
+def test_locked_tree_snapshots_should_keep_their_version_under_concurrent_writes():
+    asa = LockedASA()
+    asa.insert_many(range(200))
+    taken = []
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                with asa.lock.read():
+                    snapshot = asa.snapshot()
+                    expected = [(element.key, element.count) for element in asa]
+                taken.append((snapshot, expected))
+                # half of the snapshots are read while writes go on, the rest after them
+                if len(taken) % 2:
+                    assert [(element.key, element.count) for element in snapshot] == expected
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+
+    rnd = random.Random(1)
+    for _ in range(200):
+        asa.insert(rnd.randrange(300)) if rnd.random() < 0.5 else asa.delete(rnd.randrange(300))
+
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert all([(element.key, element.count) for element in snapshot] == expected for snapshot, expected in taken)
@@ -0,0 +1,66 @@
+import random
+
+from ASA.ASA_tree_and_d_queue import ASA, ASABaseElem
+from ASA.instrumentation import InstrumentedASA
+from ASA.test_asa import check_structure
+
+
+def test_instrumented_tree_should_behave_like_plain_tree():
+    rnd = random.Random(3)
+    keys = [rnd.randrange(200) for _ in range(600)]
+    plain, instrumented = ASA(), InstrumentedASA()
+
+    for key in keys:
+        plain.insert(key)
+        instrumented.insert(key)
+    check_structure(plain.root, instrumented.root)
+
+    for key in keys[:400]:
+        assert bool(plain.delete(key)) == bool(instrumented.delete(key))
+    check_structure(plain.root, instrumented.root)
+    assert [(el.key, el.count) for el in plain] == [(el.key, el.count) for el in instrumented]
+
+
+def test_counters_should_track_comparisons_visits_relinks_and_structure():
+    asa = InstrumentedASA()
+    for key in range(10):
+        asa.insert(key)
+
+    assert asa.counters['relinks'] == 9
+    assert asa.counters['split_and_propagate'] > 0
+    assert asa.counters['node_visits'] >= 10
+    assert asa.counters['comparisons'] > 0
+
+    asa.reset_counters()
+    asa.search(asa.root.keys[0].key)
+    assert asa.counters == {'node_visits': 1, 'comparisons': 1}
+
+    for key in range(10):
+        asa.delete(key)
+    assert asa.counters['try_siblings'] > 0
+    assert asa.counters['relinks'] >= 10
+
+
+def test_hooks_should_receive_structural_events():
+    events = []
+    asa = InstrumentedASA(hooks=[lambda event, tree, node: events.append((event, tree))])
+
+    asa.insert(1)
+    asa.insert(2)
+    asa.insert(3)
+
+    assert events == [('split_and_propagate', asa)]
+
+    asa.remove_hook(asa.hooks[0])
+    asa.insert(4)
+    asa.insert(5)
+    assert len(events) == 1
+
+
+def test_plain_tree_should_keep_plain_elements():
+    asa = ASA()
+    element = asa.insert(1)
+
+    assert type(element) is ASABaseElem
+    assert not hasattr(asa, 'counters')
+    assert InstrumentedASA().insert(1) == element
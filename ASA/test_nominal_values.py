@@ -0,0 +1,69 @@
+from ASA.ASA_tree_and_d_queue import ASABaseElem
+from ASA.nominal_values import NominalValues
+
+
+def test_insert_should_create_element_once_and_count_duplicates():
+    values = NominalValues()
+
+    first = values.insert('setosa')
+    second = values.insert('setosa')
+    values.insert('virginica')
+
+    assert first is second
+    assert isinstance(first, ASABaseElem)
+    assert first.count == 2
+    assert len(values) == 2
+
+
+def test_search_should_return_element_or_false():
+    values = NominalValues()
+    inserted = values.insert('a')
+
+    assert values.search('a') == (inserted, None)
+    assert values.search('b') == (False, None)
+
+
+def test_delete_should_decrement_count_and_remove_last_occurrence():
+    values = NominalValues()
+    for key in ['a', 'a', 'b']:
+        values.insert(key)
+
+    assert values.delete('a') is True
+    assert values.search('a')[0].count == 1
+
+    removed = values.delete('a')
+    assert removed == 'a'
+    assert values.search('a') == (False, None)
+    assert [el.key for el in values] == ['b']
+
+
+def test_delete_should_return_false_for_missing_key():
+    assert NominalValues().delete('missing') is False
+
+
+def test_null_keys_should_share_null_bucket():
+    values = NominalValues()
+    first = values.insert(None)
+    second = values.insert(float('nan'))
+    values.insert('a')
+
+    assert first is second is values.nulls
+    assert values.nulls.count == 2
+    assert [el.key for el in values] == ['a']
+    assert values.search(float('nan')) == (values.nulls, None)
+
+    values.delete(None)
+    assert values.delete(float('nan')).key is None
+    assert values.nulls is None
+
+
+def test_stats_should_count_records_and_categories():
+    values = NominalValues()
+    for key in ['a', 'b', 'a', None]:
+        values.insert(key)
+    values.delete('b')
+
+    stats = values.stats()
+
+    assert (stats['distinct'], stats['total'], stats['nulls'], stats['height']) == (1, 2, 1, 0)
+    assert stats['bytes'] > 0
@@ -0,0 +1,48 @@
+import argparse
+import json
+import sys
+
+from performance_testing import benchmark, t_agds, t_asa
+
+BENCHMARKS = {**t_asa.BENCHMARKS, **t_agds.BENCHMARKS}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m performance_testing', description='ASA and AGDS benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=benchmark.DEFAULT_SIZES)
+    parser.add_argument('--full', action='store_true', help=f'run every size in {benchmark.FULL_SIZES}')
+    parser.add_argument('--distributions', nargs='+', choices=benchmark.DISTRIBUTIONS, default=list(benchmark.DISTRIBUTIONS))
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against, exits with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=benchmark.REGRESSION_THRESHOLD,
+                        help='relative slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    report = benchmark.run(
+        {name: BENCHMARKS[name] for name in args.benchmarks},
+        sizes=benchmark.FULL_SIZES if args.full else args.sizes,
+        distributions=args.distributions,
+        repeat=args.repeat,
+        seed=args.seed,
+        log=lambda line: print(line, file=sys.stderr),
+    )
+
+    if args.output:
+        benchmark.save(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline is None:
+        return 0
+
+    rows = benchmark.compare(report, benchmark.load(args.baseline), args.threshold)
+    benchmark.print_comparison(rows)
+
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
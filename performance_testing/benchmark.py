@@ -0,0 +1,133 @@
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5)
+FULL_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+REGRESSION_THRESHOLD = 0.25
+
+
+def sorted_keys(n, seed):
+    return list(range(n))
+
+
+def reverse_keys(n, seed):
+    return list(range(n, 0, -1))
+
+
+def uniform_keys(n, seed):
+    rnd = random.Random(seed)
+    return [rnd.randrange(n) for _ in range(n)]
+
+
+def zipf_keys(n, seed):
+    # heavy duplication, a handful of keys carry most of the records
+    return np.minimum(np.random.default_rng(seed).zipf(1.5, n), n).tolist()
+
+
+def nearly_sorted_keys(n, seed):
+    rnd = random.Random(seed)
+    keys = list(range(n))
+    for _ in range(max(1, n // 100)):
+        i, j = rnd.randrange(n), rnd.randrange(n)
+        keys[i], keys[j] = keys[j], keys[i]
+    return keys
+
+
+DISTRIBUTIONS = {
+    'sorted': sorted_keys,
+    'reverse': reverse_keys,
+    'uniform': uniform_keys,
+    'zipf': zipf_keys,
+    'nearly_sorted': nearly_sorted_keys,
+}
+
+
+def run(benchmarks, sizes=DEFAULT_SIZES, distributions=tuple(DISTRIBUTIONS), repeat=3, seed=0, log=None):
+    """Time every benchmark for each size and key distribution.
+
+    `benchmarks` maps a name to a function taking the keys and returning a
+    pair (elapsed seconds, operations), so the benchmark decides what part of
+    its work is timed. The best of `repeat` runs is kept.
+    """
+    results = []
+    for size in sizes:
+        for distribution in distributions:
+            keys = DISTRIBUTIONS[distribution](size, seed)
+            for name, benchmark in benchmarks.items():
+                timings = [benchmark(keys) for _ in range(repeat)]
+                seconds, operations = min(timings)
+                result = {
+                    'benchmark': name,
+                    'distribution': distribution,
+                    'size': size,
+                    'seconds': seconds,
+                    'ns_per_op': seconds / operations * 1e9,
+                }
+                results.append(result)
+                if log is not None:
+                    log(f'{name:<24} {distribution:<14} {size:>9} {result["ns_per_op"]:>14.1f} ns/op')
+
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD, metric='ns_per_op'):
+    """Match results to the baseline and flag the ones worse by more than `threshold`.
+
+    Returns a list of dicts with the baseline and current value of `metric`,
+    their ratio and a `regression` flag. Results missing from the baseline
+    are skipped.
+    """
+    def key(result):
+        return result['benchmark'], result['distribution'], result['size']
+
+    previous = {key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        if key(result) not in previous:
+            continue
+
+        before = previous[key(result)][metric]
+        ratio = result[metric] / before if before else float('inf')
+        rows.append({
+            'benchmark': result['benchmark'],
+            'distribution': result['distribution'],
+            'size': result['size'],
+            'metric': metric,
+            'baseline': before,
+            'current': result[metric],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+
+    return rows
+
+
+def print_comparison(rows, file=sys.stderr):
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f'{row["benchmark"]:<24} {row["distribution"]:<14} {row["size"]:>9} {row["metric"]:<22} '
+              f'{row["baseline"]:>14.1f} -> {row["current"]:>14.1f} x{row["ratio"]:.2f} {flag}', file=file)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(report, path):
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
@@ -0,0 +1,139 @@
+"""Memory benchmark of AGDS.build_from_pandas.
+
+Graphs are built from synthetic frames of growing size under tracemalloc.
+The peak and the retained (still allocated after the build) bytes are
+reported per row and per distinct value, together with the source lines
+retaining the most memory. With --baseline the run fails when bytes per row
+grew by more than --threshold.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from performance_testing import benchmark
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5)
+METRICS = ('peak_bytes_per_row', 'retained_bytes_per_row')
+HOTSPOTS = 10
+
+# hotspots are reported for lines of the repository, not pandas or the interpreter
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_frame(size, distribution='uniform', seed=0):
+    keys = benchmark.DISTRIBUTIONS[distribution](size, seed)
+    return pd.DataFrame({
+        'value': keys,
+        'bucket': [f'b{key % 100}' for key in keys],
+    })
+
+
+def measure(df, hotspots=HOTSPOTS):
+    """Build a graph from `df` under tracemalloc.
+
+    Returns peak and retained bytes of the build, the number of distinct
+    values over all attributes and the `hotspots` repository lines
+    retaining the most memory.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+
+        agds = AGDS()
+        agds.build_from_pandas(df)
+
+        retained, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    distinct = sum(len(agds.attributes[col]) for col in agds.attributes)
+    lines = [
+        stat for stat in after.compare_to(before, 'lineno')
+        if stat.size_diff > 0 and stat.traceback[0].filename.startswith(REPOSITORY)
+    ]
+    return {
+        'peak_bytes': peak - start,
+        'retained_bytes': retained - start,
+        'distinct': distinct,
+        'hotspots': [
+            {
+                'location': f'{os.path.relpath(stat.traceback[0].filename, REPOSITORY)}:{stat.traceback[0].lineno}',
+                'bytes': stat.size_diff,
+                'blocks': stat.count_diff,
+            }
+            for stat in lines[:hotspots]
+        ],
+    }
+
+
+def run(sizes=SIZES, distributions=('uniform',), seed=0, hotspots=HOTSPOTS, log=None):
+    results = []
+    for size in sizes:
+        for distribution in distributions:
+            measured = measure(synthetic_frame(size, distribution, seed), hotspots)
+            result = {
+                'benchmark': 'agds.build_from_pandas',
+                'distribution': distribution,
+                'size': size,
+                **measured,
+                'peak_bytes_per_row': measured['peak_bytes'] / size,
+                'retained_bytes_per_row': measured['retained_bytes'] / size,
+                'retained_bytes_per_distinct': measured['retained_bytes'] / measured['distinct'],
+            }
+            results.append(result)
+            if log is not None:
+                log(f'{distribution:<14} {size:>9} peak {result["peak_bytes_per_row"]:>10.1f} B/row, '
+                    f'retained {result["retained_bytes_per_row"]:>10.1f} B/row, '
+                    f'{result["retained_bytes_per_distinct"]:>10.1f} B/distinct')
+
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'seed': seed,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m performance_testing.memory', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--distributions', nargs='+', choices=benchmark.DISTRIBUTIONS, default=['uniform'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--hotspots', type=int, default=HOTSPOTS, help='source lines reported per build')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against, exits with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=benchmark.REGRESSION_THRESHOLD,
+                        help='relative growth of bytes per row counted as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.distributions, args.seed, args.hotspots,
+                 log=lambda line: print(line, file=sys.stderr))
+
+    if args.output:
+        benchmark.save(report, args.output)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline is None:
+        return 0
+
+    baseline = benchmark.load(args.baseline)
+    rows = [row for metric in METRICS for row in benchmark.compare(report, baseline, args.threshold, metric)]
+    benchmark.print_comparison(rows)
+
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
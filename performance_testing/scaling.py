@@ -0,0 +1,90 @@
+"""Empirical complexity check of ASA operations.
+
+Every operation is timed at geometrically growing sizes, its cost is divided
+by the documented bound (log n or n) and the exponent k of what is left,
+cost / bound ~ n^k, is fitted on a log-log scale. An operation within its
+bound fits k close to 0, the check fails when k goes over `SLACK`.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from performance_testing import benchmark, t_asa
+
+SIZES = (2 ** 10, 2 ** 12, 2 ** 14, 2 ** 16)
+
+BOUNDS = {
+    'log': np.log2,
+    'linear': np.asarray,
+}
+
+# growth beyond the bound left for timer noise and cache effects of a growing working set
+SLACK = 0.35
+
+OPERATIONS = {
+    'insert': (t_asa.insert, 'log'),
+    'search': (t_asa.search, 'log'),
+    'delete': (t_asa.delete, 'log'),
+    'median': (t_asa.median, 'linear'),
+    'sum': (t_asa.total, 'linear'),
+}
+
+
+def fit_exponent(sizes, costs):
+    slope, _ = np.polyfit(np.log(sizes), np.log(costs), 1)
+    return float(slope)
+
+
+def measure(operation, sizes=SIZES, distribution='uniform', repeat=3, seed=0):
+    # best cost per operation in seconds at each size
+    costs = []
+    for size in sizes:
+        keys = benchmark.DISTRIBUTIONS[distribution](size, seed)
+        seconds, operations = min(operation(keys) for _ in range(repeat))
+        costs.append(seconds / operations)
+    return costs
+
+
+def check(operations=None, sizes=SIZES, distribution='uniform', repeat=3, seed=0, slack=SLACK):
+    """Fit the exponent of every operation and compare it with its bound.
+
+    `operations` maps a name to a pair (benchmark function, bound), where the
+    function follows the `performance_testing.benchmark` protocol and bound
+    is a key of `BOUNDS`. Returns a list of dicts, one per operation, with
+    the exponent fitted over the bound and an `ok` flag.
+    """
+    results = []
+    for name, (operation, bound) in (operations or OPERATIONS).items():
+        costs = measure(operation, sizes, distribution, repeat, seed)
+        exponent = fit_exponent(sizes, np.asarray(costs) / BOUNDS[bound](np.asarray(sizes, dtype=float)))
+        results.append({
+            'operation': name,
+            'bound': bound,
+            'exponent': exponent,
+            'ok': exponent <= slack,
+        })
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m performance_testing.scaling', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--distribution', choices=benchmark.DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--slack', type=float, default=SLACK)
+    args = parser.parse_args(argv)
+
+    results = check({name: OPERATIONS[name] for name in args.operations}, args.sizes, args.distribution, args.repeat,
+                    slack=args.slack)
+    for result in results:
+        print(f'{result["operation"]:<10} O({result["bound"]}) x n^{result["exponent"]:.2f} '
+              f'{"ok" if result["ok"] else "FAIL"}')
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import time
+
+import pandas as pd
+
+from AGDS.AGDS_mixed_implementation import AGDS
+
+
+def build_from_pandas(keys):
+    df = pd.DataFrame({
+        'value': keys,
+        'bucket': [f'b{key % 100}' for key in keys],
+    })
+    start = time.perf_counter()
+    AGDS().build_from_pandas(df)
+    return time.perf_counter() - start, len(keys)
+
+
+BENCHMARKS = {
+    'agds.build_from_pandas': build_from_pandas,
+}
@@ -0,0 +1,60 @@
+import time
+
+from ASA.ASA_tree_and_d_queue import ASA
+
+# aggregates are a single call each, repeated to get above timer noise
+AGGREGATE_CALLS = 20
+
+
+def build(keys):
+    asa = ASA()
+    for key in keys:
+        asa.insert(key)
+    return asa
+
+
+def insert(keys):
+    start = time.perf_counter()
+    build(keys)
+    return time.perf_counter() - start, len(keys)
+
+
+def search(keys):
+    asa = build(keys)
+    start = time.perf_counter()
+    for key in keys:
+        asa.search(key)
+    return time.perf_counter() - start, len(keys)
+
+
+def delete(keys):
+    asa = build(keys)
+    start = time.perf_counter()
+    for key in keys:
+        asa.delete(key)
+    return time.perf_counter() - start, len(keys)
+
+
+def median(keys):
+    asa = build(keys)
+    start = time.perf_counter()
+    for _ in range(AGGREGATE_CALLS):
+        asa.median
+    return time.perf_counter() - start, AGGREGATE_CALLS
+
+
+def total(keys):
+    asa = build(keys)
+    start = time.perf_counter()
+    for _ in range(AGGREGATE_CALLS):
+        asa.sum
+    return time.perf_counter() - start, AGGREGATE_CALLS
+
+
+BENCHMARKS = {
+    'asa.insert': insert,
+    'asa.search': search,
+    'asa.delete': delete,
+    'asa.median': median,
+    'asa.sum': total,
+}
@@ -0,0 +1,30 @@
+import random
+import timeit
+
+from AGDS.bitmap import RowBitmap
+
+ROWS = 1_000_000
+
+
+def random_rows(fraction, seed):
+    rnd = random.Random(seed)
+    return rnd.sample(range(ROWS), int(ROWS * fraction))
+
+
+def compare(fractions=(0.5, 0.1, 0.01), repeat=5):
+    for fraction in fractions:
+        left_rows, right_rows = random_rows(fraction, 1), random_rows(fraction, 2)
+
+        left_set, right_set = set(left_rows), set(right_rows)
+        left_bitmap = RowBitmap.from_indices(left_rows, ROWS)
+        right_bitmap = RowBitmap.from_indices(right_rows, ROWS)
+
+        set_time = min(timeit.repeat(lambda: left_set & right_set, number=1, repeat=repeat))
+        bitmap_time = min(timeit.repeat(lambda: left_bitmap & right_bitmap, number=1, repeat=repeat))
+
+        print(f'rows={ROWS} density={fraction}: set AND {set_time * 1000:.3f} ms, '
+              f'bitmap AND {bitmap_time * 1000:.3f} ms, speedup x{set_time / bitmap_time:.1f}')
+
+
+if __name__ == '__main__':
+    compare()
@@ -0,0 +1,74 @@
+import asyncio
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from AGDS.AGDS_mixed_implementation import AGDS
+from AGDS.query import Eq, Range
+from AGDS.service import AGDSService
+
+ROWS = 100_000
+PERCENTILES = (50, 90, 99)
+
+
+def latency_percentiles(latencies, percentiles=PERCENTILES):
+    # milliseconds
+    values = np.percentile(np.asarray(latencies) * 1000, percentiles)
+    return {f'p{percentile}': float(value) for percentile, value in zip(percentiles, values)}
+
+
+async def run_load(service, make_request, requests, concurrency):
+    """Send `requests` requests from `concurrency` in-process clients and time each one.
+
+    `make_request(i)` returns the coroutine of the i-th request. Returns
+    latency percentiles in milliseconds and the throughput.
+    """
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter()
+            await make_request(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {**latency_percentiles(latencies), 'requests_per_second': requests / elapsed, **service.metrics()}
+
+
+def request_mix(service, seed=0):
+    rnd = random.Random(seed)
+
+    def make_request(i):
+        kind = rnd.random()
+        if kind < 0.6:
+            low = rnd.randrange(0, 1000, 100)
+            return service.query(Range('value', low, low + 100), Eq('bucket', f'b{rnd.randrange(10)}'))
+        if kind < 0.9:
+            return service.similar({'value': rnd.randrange(1000)}, k=10, cutoff=0.9)
+        return service.stats('value')
+
+    return make_request
+
+
+async def compare(requests=2000, concurrency=(1, 16, 64)):
+    rnd = random.Random(0)
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({
+        'value': [rnd.randrange(1000) for _ in range(ROWS)],
+        'bucket': [f'b{rnd.randrange(10)}' for _ in range(ROWS)],
+    }))
+
+    for clients in concurrency:
+        async with AGDSService(agds) as service:
+            result = await run_load(service, request_mix(service), requests, clients)
+        print(f'clients={clients}: ' + ', '.join(f'{name}={value:.1f}' for name, value in result.items()))
+
+
+if __name__ == '__main__':
+    asyncio.run(compare())
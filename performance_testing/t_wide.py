@@ -0,0 +1,44 @@
+import os
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from AGDS.AGDS_mixed_implementation import AGDS
+
+ROWS = 10_000
+ATTRIBUTES = 120
+
+
+def wide_graph(rows=ROWS, attributes=ATTRIBUTES, seed=0):
+    rng = np.random.default_rng(seed)
+    agds = AGDS()
+    agds.build_from_pandas(pd.DataFrame({f'a{i}': rng.integers(0, 1000, rows).astype(float) for i in range(attributes)}))
+    return agds
+
+
+def compare(rows=ROWS, attributes=ATTRIBUTES, workers=(2, 4, 8), cutoff=0.5, repeat=5):
+    """Time similar() on a table of `attributes` ordered columns, sequentially and on thread pools.
+
+    Speedup over the sequential call is bounded by the host's cores.
+    """
+    agds = wide_graph(rows, attributes)
+    rng = np.random.default_rng(1)
+    query = {col: float(rng.integers(0, 1000)) for col in agds.attributes}
+    expected = agds.similar(query, k=10, cutoff=cutoff)
+
+    sequential = min(timeit.repeat(lambda: agds.similar(query, k=10, cutoff=cutoff), number=1, repeat=repeat))
+    print(f'rows={rows} attributes={attributes} cores={os.cpu_count()}: sequential {sequential * 1000:.2f} ms')
+
+    for count in workers:
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            assert agds.similar(query, k=10, cutoff=cutoff, executor=executor) == expected
+            threaded = min(timeit.repeat(
+                lambda: agds.similar(query, k=10, cutoff=cutoff, executor=executor), number=1, repeat=repeat,
+            ))
+        print(f'  {count} threads {threaded * 1000:.2f} ms, speedup x{sequential / threaded:.2f}')
+
+
+if __name__ == '__main__':
+    compare()
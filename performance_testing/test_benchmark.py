@@ -0,0 +1,38 @@
+import pytest
+
+from performance_testing import benchmark
+from performance_testing.__main__ import main
+
+
+@pytest.mark.parametrize('distribution', benchmark.DISTRIBUTIONS)
+def test_distributions_should_produce_requested_number_of_int_keys(distribution):
+    keys = benchmark.DISTRIBUTIONS[distribution](500, 1)
+
+    assert len(keys) == 500
+    assert all(type(key) is int for key in keys)
+
+
+def test_compare_should_flag_slowdowns_above_threshold():
+    def report(*timings):
+        return {'results': [
+            {'benchmark': name, 'distribution': 'uniform', 'size': 10, 'ns_per_op': ns} for name, ns in timings
+        ]}
+
+    rows = benchmark.compare(report(('a', 130), ('b', 110), ('new', 1)), report(('a', 100), ('b', 100)), threshold=0.2)
+
+    assert [(row['benchmark'], row['regression']) for row in rows] == [('a', True), ('b', False)]
+    assert rows[0]['ratio'] == pytest.approx(1.3)
+
+
+def test_main_should_write_report_and_fail_on_regression(tmp_path):
+    output, baseline = tmp_path / 'bench.json', tmp_path / 'baseline.json'
+    args = ['--sizes', '100', '--distributions', 'zipf', '--benchmarks', 'asa.insert', '--repeat', '1']
+
+    assert main(args + ['--output', str(output)]) == 0
+
+    report = benchmark.load(output)
+    assert [(r['benchmark'], r['distribution'], r['size']) for r in report['results']] == [('asa.insert', 'zipf', 100)]
+
+    report['results'][0]['ns_per_op'] /= 1000
+    benchmark.save(report, baseline)
+    assert main(args + ['--output', str(output), '--baseline', str(baseline)]) == 1
@@ -0,0 +1,27 @@
+from performance_testing import benchmark, memory
+
+
+def test_measure_should_report_build_allocations_and_repository_hotspots():
+    measured = memory.measure(memory.synthetic_frame(500), hotspots=3)
+
+    assert measured['retained_bytes'] > 0
+    assert measured['peak_bytes'] >= measured['retained_bytes']
+    assert measured['distinct'] > 100
+    assert 0 < len(measured['hotspots']) <= 3
+    assert all(spot['location'].startswith(('AGDS', 'ASA')) for spot in measured['hotspots'])
+
+
+def test_main_should_fail_when_bytes_per_row_grew(tmp_path):
+    output, baseline = tmp_path / 'memory.json', tmp_path / 'baseline.json'
+    args = ['--sizes', '200', '--hotspots', '1', '--output', str(output)]
+
+    assert memory.main(args) == 0
+
+    report = benchmark.load(output)
+    assert report['results'][0]['retained_bytes_per_row'] > 0
+    benchmark.save(report, baseline)
+    assert memory.main(args + ['--baseline', str(baseline), '--threshold', '1.0']) == 0
+
+    report['results'][0]['peak_bytes_per_row'] /= 10
+    benchmark.save(report, baseline)
+    assert memory.main(args + ['--baseline', str(baseline)]) == 1
@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from performance_testing import scaling
+
+
+def fake(cost):
+    # benchmark protocol with a deterministic cost per operation
+    def operation(keys):
+        return cost(len(keys)) * len(keys), len(keys)
+    return operation
+
+
+def test_fit_exponent_should_recover_power_law():
+    sizes = [2 ** 8, 2 ** 10, 2 ** 12]
+
+    assert scaling.fit_exponent(sizes, [n ** 1.5 for n in sizes]) == pytest.approx(1.5)
+
+
+def test_check_should_accept_operations_within_their_bound():
+    results = scaling.check({
+        'log': (fake(math.log2), 'log'),
+        'constant': (fake(lambda n: 1.0), 'log'),
+        'linear': (fake(lambda n: n), 'linear'),
+    }, sizes=(2 ** 6, 2 ** 8, 2 ** 10), repeat=1)
+
+    assert all(result['ok'] for result in results)
+
+
+def test_check_should_reject_operations_growing_past_their_bound():
+    results = scaling.check({
+        'accidentally_linear': (fake(lambda n: n), 'log'),
+        'quadratic': (fake(lambda n: n * n), 'linear'),
+    }, sizes=(2 ** 6, 2 ** 8, 2 ** 10), repeat=1)
+
+    assert [result['ok'] for result in results] == [False, False]
+    assert results[1]['exponent'] == pytest.approx(1.0)